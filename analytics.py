@@ -0,0 +1,552 @@
+"""Headless query layer over the enrolment cube.
+
+Everything the dashboard computes from the data (age totals and shares,
+state/district leaderboards, monthly and weekday trends, district vs. state
+average) lives here, with no Streamlit dependency, so the same numbers can be
+produced from a batch job, a notebook or a test:
+
+    queries = EnrolmentQueries.from_source("cleaned_aadhaar_enrolment.csv")
+    queries.age_totals(state="Kerala", month="September").percentages()
+    queries.age_totals(state="Kerala", start="2025-09-01", end="2025-09-15")
+
+Results are memoized per EnrolmentQueries instance. An instance wraps one
+immutable cube, so its cache never needs invalidating: a new version of the
+data gets a new instance. Given a ``result_cache`` (caching.DiskCache), a
+result missing from the memo is looked up there by the cube's content hash
+before it is computed, so a restarted process reuses what the previous one
+computed.
+"""
+
+import functools
+import hashlib
+import importlib.util
+import inspect
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ingest import (
+    AGE_COLS,
+    CUBE_KEYS,
+    DEFAULT_MAX_MEMORY_MB,
+    MONTH_ORDER,
+    aggregate_cube,
+    duckdb_cube,
+    freeze_frame,
+    ingest_incremental,
+    read_columns,
+    read_enrolment,
+    recorded_fingerprints,
+    roll_up,
+    source_fingerprints,
+    write_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+# what builds the cube from the raw rows: pandas, or DuckDB's multi-threaded
+# engine (optional dependency) for large extracts; the cube is the same
+ENGINES = ("pandas", "duckdb")
+
+AGE_LABELS = {
+    "age_0_5": "Age 0–5",
+    "age_5_17": "Age 5–17",
+    "age_18_greater": "Age 18+",
+}
+
+
+def period_label(period: int, with_year: bool = True) -> str:
+    """'September 2025' for the period key 202509 ('September' without the year)."""
+    year, month = divmod(int(period), 100)
+    name = MONTH_ORDER[month - 1]
+    return f"{name} {year}" if with_year and year else name
+
+
+def date_key(value) -> int:
+    """The yyyymmdd key of anything ``pd.Timestamp`` accepts."""
+    stamp = pd.Timestamp(value)
+    return stamp.year * 10000 + stamp.month * 100 + stamp.day
+
+
+def pct_change(curr: float, base: float) -> float:
+    if base == 0:
+        return 0
+    return ((curr - base) / base) * 100
+
+
+@dataclass(frozen=True)
+class AgeTotals:
+    age_0_5: int
+    age_5_17: int
+    age_18_greater: int
+
+    @property
+    def total(self) -> int:
+        return self.age_0_5 + self.age_5_17 + self.age_18_greater
+
+    def as_dict(self) -> Dict[str, int]:
+        return {col: getattr(self, col) for col in AGE_COLS}
+
+    def percentages(self) -> Dict[str, float]:
+        """Share of each age group in the total, in percent (NaN when there are no registrations)."""
+        total = self.total
+        return {col: (value / total * 100 if total else float("nan"))
+                for col, value in self.as_dict().items()}
+
+    def as_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Age Group": AGE_COLS,
+            "No of Registration": [getattr(self, col) for col in AGE_COLS],
+        })
+
+
+@dataclass(frozen=True)
+class DistrictComparison:
+    state: str
+    district: str
+    totals: AgeTotals
+    # mean per-district totals over the state, the baseline for the deltas
+    state_average: Dict[str, float]
+    pct_change: Dict[str, float]
+    rank_0_5: int
+    districts: int
+
+
+class Leaderboard:
+    """Per-group totals of the three age columns, indexed by the group.
+
+    Top/bottom k use partial selection (``np.argpartition``) and ranks are
+    precomputed, so looking one up is a dict access.
+    """
+
+    def __init__(self, totals: pd.DataFrame):
+        self.key = totals.index.name
+        self.totals = totals
+        # competition ranking (ties share the better rank), highest total first
+        self._ranks = {
+            col: dict(zip(
+                self.totals.index,
+                self.totals[col].rank(method="min", ascending=False).astype(int)
+            ))
+            for col in AGE_COLS
+        }
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def _select(self, col: str, k: Optional[int], largest: bool) -> pd.DataFrame:
+        values = self.totals[col].to_numpy()
+        keyed = -values if largest else values
+        n = len(values)
+        k = n if k is None else min(k, n)
+        if k < n:
+            picked = np.argpartition(keyed, k - 1)[:k] if k > 0 else np.arange(0)
+        else:
+            picked = np.arange(n)
+        # order the k picked groups by value, ties by label order
+        picked = picked[np.lexsort((picked, keyed[picked]))]
+        return self.totals[[col]].iloc[picked].reset_index()
+
+    def top(self, col: str, k: Optional[int] = 10) -> pd.DataFrame:
+        """The k groups with the highest ``col`` (all of them for ``k=None``)."""
+        return self._select(col, k, largest=True)
+
+    def bottom(self, col: str, k: Optional[int] = 10) -> pd.DataFrame:
+        return self._select(col, k, largest=False)
+
+    def rank(self, label: Hashable, col: str) -> int:
+        return self._ranks[col][label]
+
+
+def build_row_index(frame: pd.DataFrame, keys: List[str]) -> Dict[tuple, slice]:
+    """Map every group of ``keys`` to its contiguous rows in ``frame``.
+
+    ``frame`` has to be sorted on ``keys``. Groups with a missing key are left
+    out, like a ``frame[frame[key] == value]`` filter would never select them.
+    """
+    codes = np.column_stack([pd.factorize(frame[k], sort=True)[0] for k in keys])
+    if len(codes) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]).any(axis=1)])
+    stops = np.r_[starts[1:], len(codes)]
+    labels = frame[keys].iloc[starts].itertuples(index=False, name=None)
+    return {
+        label: slice(int(start), int(stop))
+        for label, start, stop, group_codes in zip(labels, starts, stops, codes[starts])
+        if (group_codes >= 0).all()
+    }
+
+
+def _named(frame: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    # the rows of an aggregate whose ``keys`` are all present, as a groupby
+    # with dropna=True would report them
+    return frame[frame[keys].notna().all(axis=1)]
+
+
+class DrillDown:
+    """National -> state -> district aggregates, each level summed from the one below.
+
+    The cube is read once, for the district x month and district x weekday
+    totals; the state and national levels are rolled up from those, never
+    from the cube again. Each drill step then slices a level that is already
+    aggregated: a state's district leaderboard and its per-district average
+    cost O(districts in the state), a series O(months) or O(weekdays),
+    however many rows are behind them.
+
+    Missing keys are kept as their own group on the way up, so a level still
+    counts the rows of a child with no name (a row with a state but no
+    district is in the state's totals), and are dropped where a level is
+    listed by name, the way ``groupby`` drops them.
+    """
+
+    SERIES_KEYS = ("month", "days")
+
+    def __init__(self, cube: pd.DataFrame, month: pd.Categorical):
+        # ``month`` is the period key of every cube row under its chart
+        # labels, in calendar order, so the series never need relabelling
+        cube = cube.assign(month=month)
+        # series: key -> [(national, index), (per state, index), (per district, index)]
+        self._series: Dict[str, list] = {}
+        for key in self.SERIES_KEYS:
+            district = roll_up(cube, ["state", "district", key])
+            state = roll_up(district, ["state", key])
+            national = roll_up(state, [key])
+            self._series[key] = [
+                (national, {(): slice(None)}),
+                (state, build_row_index(state, ["state"])),
+                (district, build_row_index(district, ["state", "district"])),
+            ]
+        district_month = self._series["month"][2][0]
+        state_month = self._series["month"][1][0]
+
+        district = roll_up(district_month, ["state", "district"])
+        state = roll_up(district, ["state"])
+        self._totals = [
+            {(): state[AGE_COLS].to_numpy().sum(axis=0)},
+            self._rows_of(state, ["state"]),
+            self._rows_of(district, ["state", "district"]),
+        ]
+
+        # what a level lists by name: the states, and the districts of each state
+        self.states = _named(state, ["state"]).set_index("state")[AGE_COLS]
+        named = _named(district, ["state", "district"])
+        self._districts = named.set_index("district")[AGE_COLS]
+        self._district_rows = build_row_index(named, ["state"])
+
+        # mean per-district totals of every state, the baseline of the district
+        # deltas, from the same rows as the district leaderboards (0 for a
+        # state without named districts)
+        self.state_averages: Dict[str, Dict[str, float]] = {
+            label: dict.fromkeys(AGE_COLS, 0.0) for label in self.states.index
+        }
+        values = self._districts.to_numpy()
+        for (label,), rows in self._district_rows.items():
+            means = values[rows].sum(axis=0) / (rows.stop - rows.start)
+            self.state_averages[label] = dict(zip(AGE_COLS, means.tolist()))
+
+        self.month_state = _named(roll_up(state_month, ["month", "state"]), ["month", "state"])
+
+    @staticmethod
+    def _rows_of(frame: pd.DataFrame, keys: List[str]) -> Dict[tuple, np.ndarray]:
+        values = frame[AGE_COLS].to_numpy()
+        return {label: values[rows.start] for label, rows in build_row_index(frame, keys).items()}
+
+    @staticmethod
+    def _path(state: Optional[str], district: Optional[str]) -> tuple:
+        if district is not None:
+            return (state, district)
+        return () if state is None else (state,)
+
+    def totals(self, state: Optional[str] = None, district: Optional[str] = None,
+               month: Optional[str] = None) -> np.ndarray:
+        """Age sums of a node of the hierarchy, optionally of one month."""
+        path = self._path(state, district)
+        if month is None:
+            return self._totals[len(path)][path]
+        series = self.series("month", state, district, complete=False)
+        return series.loc[series["month"] == month, AGE_COLS].to_numpy().sum(axis=0)
+
+    def series(self, key: str, state: Optional[str] = None, district: Optional[str] = None,
+               complete: bool = True) -> pd.DataFrame:
+        """Age sums of a node per ``key`` (month or days), in the order of ``key``."""
+        path = self._path(state, district)
+        frame, index = self._series[key][len(path)]
+        frame = frame.iloc[index[path]]
+        return _named(frame, [key]) if complete else frame
+
+    def districts(self, state: str) -> pd.DataFrame:
+        """Totals of the named districts of ``state``, indexed by district."""
+        # a state whose rows all lack a district has none to list
+        return self._districts.iloc[self._district_rows.get((state,), slice(0, 0))]
+
+
+def load_cube(source: str, streaming: bool = False,
+              max_memory_mb: int = DEFAULT_MAX_MEMORY_MB,
+              engine: str = "pandas") -> pd.DataFrame:
+    """The (state, district, period, date, days) cube of ``source``, sorted on its keys.
+
+    The cube is memory-mapped from its column store (ingest.read_columns)
+    while the source is unchanged; otherwise it is built and the store is
+    written for the next process. ``engine="duckdb"`` sums the raw rows with
+    DuckDB rather than pandas; it falls back to pandas, with a warning, when
+    duckdb isn't installed.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+    mapped = read_columns(source)
+    if mapped is not None:
+        return mapped
+    if engine == "duckdb" and importlib.util.find_spec("duckdb") is None:
+        logger.warning("duckdb is not installed, building the cube with pandas")
+        engine = "pandas"
+    # taken before the build, so a file edited meanwhile doesn't match the
+    # store; only files not on record yet (or changed) are hashed
+    fingerprints = source_fingerprints(source, known=recorded_fingerprints(source))
+    if streaming:
+        cube, _ = ingest_incremental(source, max_memory_mb=max_memory_mb, engine=engine,
+                                     fingerprints=fingerprints)
+    elif engine == "duckdb":
+        cube = duckdb_cube(source)
+    else:
+        # the column store replaces the raw Parquet copy: a fresh one is still
+        # read, but none is written
+        cube = aggregate_cube(read_enrolment(source, write=False))
+    # serve the mapped copy too, so this process shares the page cache with
+    # the ones that start after it
+    mapped = read_columns(source) if write_columns(cube, source, fingerprints) else None
+    return cube if mapped is None else mapped
+
+
+def _memoized(method):
+    # cache results on the instance, keyed by the fully bound arguments so
+    # q.age_totals("X") and q.age_totals(state="X") share an entry
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(bound.arguments.values())[1:]
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if self.result_cache is None:
+            value = method(self, *args, **kwargs)
+        else:
+            # a result computed by an earlier process for the same cube
+            value = self.result_cache.get_or_compute(
+                (self.version,) + key, lambda: method(self, *args, **kwargs)
+            )
+        with self._memo_lock:
+            return self._memo.setdefault(key, value)
+
+    return wrapper
+
+
+class EnrolmentQueries:
+    """Typed, memoized queries over one immutable version of the cube."""
+
+    def __init__(self, cube: pd.DataFrame, result_cache=None):
+        self.cube = cube
+        # optional second level behind the memo (caching.DiskCache), keyed by
+        # the cube's version, so results outlive the instance and the process
+        self.result_cache = result_cache
+        self._memo: Dict[tuple, object] = {}
+        self._memo_lock = threading.Lock()
+
+        # state -> rows of the cube, and state -> {district -> rows}, so any
+        # selection is a positional slice and the selector options are the keys
+        self.state_rows = {
+            state: rows for (state,), rows in build_row_index(cube, ["state"]).items()
+        }
+        self.district_rows: Dict[str, Dict[str, slice]] = {state: {} for state in self.state_rows}
+        for (state, district), rows in build_row_index(cube, ["state", "district"]).items():
+            self.district_rows[state][district] = rows
+
+        # months are named after the integer period key, in its order; the
+        # year is only spelled out once the data spans more than one. Periods
+        # known by their month alone (year 0: rows without a readable date)
+        # join that month of the data's year when there is a single one.
+        periods = cube["period"].cat.categories.to_numpy()
+        years = set((periods // 100).tolist()) - {0}
+        if len(years) == 1:
+            periods = np.where(periods < 100, years.pop() * 100 + periods, periods)
+        months, month_of_period = np.unique(periods, return_inverse=True)
+        with_year = len(set((months // 100).tolist())) > 1
+        self.month_dtype = pd.CategoricalDtype([period_label(p, with_year) for p in months],
+                                               ordered=True)
+        self._month_codes = {label: code for code, label in enumerate(self.month_dtype.categories)}
+
+        # the keys as integer codes and the age columns as plain arrays, taken
+        # once, for _rows() and the date-range sums of age_totals()
+        self._codes = {key: cube[key].array.codes for key in CUBE_KEYS}
+        period_codes = self._codes["period"]
+        self._codes["month"] = np.where(period_codes >= 0, month_of_period[period_codes], -1)
+        self._values = [cube[col].to_numpy() for col in AGE_COLS]
+
+        # the rows in date order, so a date range is two binary searches
+        self._date_order = np.argsort(self._codes["date"], kind="stable")
+        self._sorted_dates = self._codes["date"][self._date_order]
+
+    @classmethod
+    def from_source(cls, source: str, streaming: bool = False,
+                    max_memory_mb: int = DEFAULT_MAX_MEMORY_MB,
+                    engine: str = "pandas", result_cache=None) -> "EnrolmentQueries":
+        return cls(freeze_frame(load_cube(source, streaming, max_memory_mb, engine)), result_cache)
+
+    @functools.cached_property
+    def version(self) -> str:
+        """Content hash of the cube, stable across processes and restarts."""
+        hashed = pd.util.hash_pandas_object(self.cube, index=False).to_numpy()
+        return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+    # ---------------- selections ----------------
+
+    def states(self) -> List[str]:
+        return list(self.state_rows)
+
+    def districts(self, state: str) -> List[str]:
+        return list(self.district_rows[state])
+
+    def months(self) -> List[str]:
+        """Months present in the data, in calendar order."""
+        present = np.unique(self._codes["month"])
+        return [self.month_dtype.categories[code] for code in present if code >= 0]
+
+    def select(self, state: Optional[str] = None, district: Optional[str] = None,
+               month: Optional[str] = None, start=None, end=None) -> pd.DataFrame:
+        """Cube rows of a selection; a district needs its state.
+
+        ``start`` and ``end`` bound the dates, both inclusive.
+        """
+        return self.cube.iloc[self._rows(state, district, month, start, end)]
+
+    def _date_rows(self, start, end) -> np.ndarray:
+        # the date categories are the sorted yyyymmdd keys: one binary search
+        # turns the range into date codes, another finds their rows
+        dates = self.cube["date"].cat.categories.to_numpy()
+        lo = 0 if start is None else np.searchsorted(dates, date_key(start), "left")
+        hi = len(dates) if end is None else np.searchsorted(dates, date_key(end), "right")
+        first, stop = np.searchsorted(self._sorted_dates, [lo, hi], "left")
+        return self._date_order[first:stop]
+
+    def _rows(self, state: Optional[str], district: Optional[str],
+              month: Optional[str], start=None, end=None):
+        # positions of a selection, as select() would pick them
+        if district is not None:
+            rows = self.district_rows[state][district]
+        elif state is not None:
+            rows = self.state_rows[state]
+        else:
+            rows = slice(None)
+        if start is not None or end is not None:
+            found = self._date_rows(start, end)
+            if rows.stop is not None:
+                found = found[(found >= rows.start) & (found < rows.stop)]
+            rows = np.sort(found)
+        if month is not None:
+            code = self._month_codes.get(month, -2)
+            if isinstance(rows, slice):
+                rows = np.flatnonzero(self._codes["month"][rows] == code) + (rows.start or 0)
+            else:
+                rows = rows[self._codes["month"][rows] == code]
+        return rows
+
+    # ---------------- queries ----------------
+
+    @functools.cached_property
+    def drill(self) -> DrillDown:
+        """The national -> state -> district aggregates the page queries read."""
+        return DrillDown(self.cube, pd.Categorical.from_codes(self._codes["month"],
+                                                              dtype=self.month_dtype))
+
+    @_memoized
+    def age_totals(self, state: Optional[str] = None, district: Optional[str] = None,
+                   month: Optional[str] = None, start=None, end=None) -> AgeTotals:
+        """Age sums of a selection; ``start`` and ``end`` bound the dates, both inclusive."""
+        if start is None and end is None:
+            sums = self.drill.totals(state, district, month)
+        else:
+            rows = self._rows(state, district, month, start, end)
+            sums = [values[rows].sum() for values in self._values]
+        return AgeTotals(**{col: int(value) for col, value in zip(AGE_COLS, sums)})
+
+    @_memoized
+    def state_leaderboard(self) -> Leaderboard:
+        return Leaderboard(self.drill.states)
+
+    @_memoized
+    def district_leaderboard(self, state: str) -> Leaderboard:
+        return Leaderboard(self.drill.districts(state))
+
+    def _trend(self, key: str, state: Optional[str], district: Optional[str]) -> pd.DataFrame:
+        # month and days are ordered categoricals, so the levels already
+        # hold them in calendar / weekday order
+        series = self.drill.series(key, state, district)
+        return freeze_frame(series[[key] + AGE_COLS].reset_index(drop=True))
+
+    @_memoized
+    def monthly_trend(self, state: Optional[str] = None,
+                      district: Optional[str] = None) -> pd.DataFrame:
+        return self._trend("month", state, district)
+
+    @_memoized
+    def weekday_trend(self, state: Optional[str] = None,
+                      district: Optional[str] = None) -> pd.DataFrame:
+        return self._trend("days", state, district)
+
+    @_memoized
+    def district_vs_state(self, state: str, district: str) -> DistrictComparison:
+        board = self.district_leaderboard(state)
+        totals = self.age_totals(state, district)
+        state_average = self.drill.state_averages[state]
+        return DistrictComparison(
+            state=state,
+            district=district,
+            totals=totals,
+            state_average=state_average,
+            pct_change={col: pct_change(getattr(totals, col), state_average[col])
+                        for col in AGE_COLS},
+            rank_0_5=board.rank(district, "age_0_5"),
+            districts=len(board),
+        )
+
+    @_memoized
+    def sunburst_table(self) -> pd.DataFrame:
+        """Month -> state -> age group totals in long form.
+
+        A few hundred rows however large the raw data is, since the hierarchy
+        never looks below state level.
+        """
+        sun_df = (
+            self.drill.month_state
+            .melt(
+                id_vars=["month", "state"],
+                value_vars=AGE_COLS,
+                var_name="Age Group",
+                value_name="Registrations"
+            )
+        )
+        sun_df["Age Group"] = sun_df["Age Group"].map(AGE_LABELS)
+        return freeze_frame(sun_df)
+
+    def warm(self) -> Tuple[int, int]:
+        """Precompute the national queries and the per-state ones for every state.
+
+        Returns (states, districts) covered.
+        """
+        self.state_leaderboard()
+        self.monthly_trend()
+        self.sunburst_table()
+        districts = 0
+        for state in self.states():
+            self.district_leaderboard(state)
+            self.monthly_trend(state)
+            self.weekday_trend(state)
+            districts += len(self.district_rows[state])
+        return len(self.state_rows), districts
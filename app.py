@@ -1,20 +1,125 @@
+import functools
+import json
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
 
+import boot
+import charts
+from caching import LRUCache
+from profiling import Profiler
+
+# The data source (AADHAAR_SOURCE, AADHAAR_STREAMING, AADHAAR_ENGINE, ...) is
+# configured in boot.py, which also owns the dataset store every session reads.
+# Serve with `python boot.py` to have it loaded before the first visitor.
+
+# budget for rendered Matplotlib PNGs kept across reruns and sessions
+IMAGE_CACHE_MB = int(os.environ.get("AADHAAR_IMAGE_CACHE_MB", 64))
+# budget for serialized Plotly figures, likewise
+FIGURE_CACHE_MB = int(os.environ.get("AADHAAR_FIGURE_CACHE_MB", 64))
+# AADHAAR_PROFILE=1 profiles every rerun: a per-section breakdown in the
+# sidebar, appended to AADHAAR_PROFILE_LOG too. With AADHAAR_PROFILE_URL=1 a
+# single session can ask for it with ?profile=1; off by default, since any
+# visitor could otherwise slow the process down and write to the log
+PROFILE = os.environ.get("AADHAAR_PROFILE") == "1"
+PROFILE_URL = os.environ.get("AADHAAR_PROFILE_URL") == "1"
+PROFILE_LOG = os.environ.get("AADHAAR_PROFILE_LOG", "aadhaar_profile.jsonl")
 
 
 st.set_page_config(layout="wide")
 
-@st.cache_data(show_spinner=True)
-def load_data():
-    return pd.read_csv(
-        'cleaned_aadhaar_enrolment.csv',
-        low_memory=False
-    )
 
-df = load_data()
+def active_profiler():
+    # a fragment rerun runs the fragment alone, not the top of the script: the
+    # profiler of the rerun in progress, full or fragment, is kept in the
+    # session rather than read from the module global
+    return st.session_state["profiler"]
+
+
+def profiled_fragment(func):
+    """st.fragment whose reruns are profiled by a Profiler of their own."""
+
+    @functools.wraps(func)
+    def run(*args):
+        outer = active_profiler()
+        if not outer.closed:
+            # drawn by a full rerun: a section of that rerun
+            with outer.section(func.__name__):
+                return func(*args)
+        rerun = Profiler(enabled=outer.enabled, log_path=PROFILE_LOG, page=outer.page)
+        st.session_state["profiler"] = rerun
+        try:
+            with rerun.section(func.__name__):
+                func(*args)
+        finally:
+            rerun.close()
+        if rerun.enabled:
+            # the sidebar belongs to the full rerun, so a fragment rerun shows
+            # its breakdown in the fragment
+            with st.expander("Profiling (fragment rerun)"):
+                st.caption(f"Rerun {rerun.run_id}: {rerun.elapsed_ms():.0f} ms, logged to {PROFILE_LOG}")
+                st.dataframe(rerun.frame().round(1), hide_index=True)
+
+    return st.fragment(run)
+
+
+@st.cache_resource(show_spinner=False)
+def image_cache():
+    return LRUCache(max_bytes=IMAGE_CACHE_MB * 1024 * 1024)
+
+
+def show_pyplot(chart, *selection):
+    # Matplotlib charts are rendered to PNG once per (chart, selection) and data
+    # version; repeat selections, from any session, reuse the bytes, and a miss
+    # here is looked up in the on-disk result cache before rendering
+    key = (chart.__name__, queries.version) + selection
+
+    def render():
+        with active_profiler().section("build"):
+            fig = chart(queries, *selection)
+        with active_profiler().section("render"):
+            return charts.render_png(fig)
+
+    with active_profiler().section(f"image {chart.__name__}"):
+        png = image_cache().get_or_compute(key, lambda: boot.cached(("image",) + key, render))
+        st.image(png, width="stretch")
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    return LRUCache(max_bytes=FIGURE_CACHE_MB * 1024 * 1024)
+
+
+def cached_figure(page, chart, *selection):
+    # Plotly figures are built once per (page, chart, selection) and data
+    # version and kept as JSON, so a rerun triggered by an unrelated widget
+    # doesn't rebuild them; st.plotly_chart takes the decoded dict as is
+    key = (page, chart.__name__, queries.version) + selection
+
+    def build():
+        with active_profiler().section("build"):
+            fig = chart(queries, *selection)
+        with active_profiler().section("to_json"):
+            return fig.to_json()
+
+    with active_profiler().section(f"figure {chart.__name__}"):
+        spec = figure_cache().get_or_compute(key, lambda: boot.cached(("figure",) + key, build))
+        return json.loads(spec)
+
+
+profiler = Profiler(
+    enabled=PROFILE or (PROFILE_URL and st.query_params.get("profile") == "1"),
+    log_path=PROFILE_LOG,
+)
+st.session_state["profiler"] = profiler
+
+
+with st.spinner("Loading enrolment data..."), profiler.section("snapshot"):
+    # taken once per rerun, so a swap half way through a page can't mix versions;
+    # the pages must treat it as read-only, every session shares it
+    snapshot = boot.dataset_store().current()
+
+queries = snapshot.queries
 
 st.sidebar.title('Analysis Of Aadhaar Enrolment')
 
@@ -28,75 +133,74 @@ option = st.sidebar.selectbox(
 
     ]
 )
+profiler.page = option
 
 if option == "Overall Analysis":
     st.title("Overall Analysis")
 
-    # ---------------- Month selector ----------------
-    months = sorted(df["month"].unique())
-    selected_month = st.sidebar.selectbox("Select Month", months)
-
-    # ---------------- Filter selected month ----------------
-    month_df = df[df["month"] == selected_month]
-
-    # ---------------- Aggregate (SUM) ----------------
-    st.subheader(f"Total registration In ({selected_month})")
-    age_sum = month_df[["age_0_5", "age_5_17", "age_18_greater"]].sum()
-
-    total_reg = age_sum.sum()
-
-    # ---------------- Percentage ----------------
-    age_pct = (age_sum / total_reg) * 100
-
-    # ---------------- Display metrics ----------------
-    col1, col2, col3 = st.columns(3)
+    # Only the metric cards read the month, so the month selector lives in a
+    # fragment with them: picking another month reruns this section alone and
+    # leaves the tables and charts below as they are.
+    @profiled_fragment
+    def month_totals_section():
+        # ---------------- Month selector (calendar order) ----------------
+        months = queries.months()
+        selected_month = st.selectbox("Select Month", months)
+
+        # ---------------- Aggregate (SUM) for the selected month ----------------
+        st.subheader(f"Total registration In ({selected_month})")
+        with active_profiler().section("month totals"):
+            month_totals = queries.age_totals(month=selected_month)
+        age_sum = month_totals.as_dict()
+
+        # ---------------- Percentage ----------------
+        age_pct = month_totals.percentages()
+
+        # ---------------- Display metrics ----------------
+        col1, col2, col3 = st.columns(3)
+
+        col1.metric(
+            "Age 0–5",
+            f"{int(age_sum['age_0_5']):,}",
+            f"{age_pct['age_0_5']:.2f}%"
+        )
 
-    col1.metric(
-        "Age 0–5",
-        f"{int(age_sum['age_0_5']):,}",
-        f"{age_pct['age_0_5']:.2f}%"
-    )
+        col2.metric(
+            "Age 5–17",
+            f"{int(age_sum['age_5_17']):,}",
+            f"{age_pct['age_5_17']:.2f}%"
+        )
 
-    col2.metric(
-        "Age 5–17",
-        f"{int(age_sum['age_5_17']):,}",
-        f"{age_pct['age_5_17']:.2f}%"
-    )
+        col3.metric(
+            "Age 18+",
+            f"{int(age_sum['age_18_greater']):,}",
+            f"{age_pct['age_18_greater']:.2f}%"
+        )
 
-    col3.metric(
-        "Age 18+",
-        f"{int(age_sum['age_18_greater']):,}",
-        f"{age_pct['age_18_greater']:.2f}%"
-    )
+    month_totals_section()
 
     st.markdown("---")
-    col1, col2,col3 = st.columns(3)
-    with col1:
-        st.subheader("Top 10 State In (Children) Enrolment")
-        age_5_17_df = (df.groupby('state')[['age_0_5']].sum()
-        .reset_index().sort_values('age_0_5',
-                                                                                                       ascending=False).head(
-            10)).reset_index(drop=True)
-        st.dataframe(age_5_17_df)
-        st.markdown("---")
+    with profiler.section("top 10 tables"):
+        states_board = queries.state_leaderboard()
 
-    with col2:
-        st.subheader("Top 10 State In (Youths) Enrolment")
-        age_0_5_df = (df.groupby('state')[['age_5_17']].sum()
-        .reset_index().sort_values('age_5_17',
-                                   ascending=False).head(
-            10)).reset_index(drop=True)
-        st.dataframe(age_0_5_df)
-        st.markdown("---")
+        col1, col2,col3 = st.columns(3)
+        with col1:
+            st.subheader("Top 10 State In (Children) Enrolment")
+            age_0_5_df = states_board.top('age_0_5', 10)
+            st.dataframe(age_0_5_df)
+            st.markdown("---")
 
-    with col3:
-        st.subheader("Top 10 State In (Adults) Enrolment")
-        age_18_greater_df = (df.groupby('state')[['age_18_greater']].sum()
-        .reset_index().sort_values('age_18_greater',
-                                   ascending=False).head(
-            10)).reset_index(drop=True)
-        st.dataframe(age_18_greater_df)
-        st.markdown("---")
+        with col2:
+            st.subheader("Top 10 State In (Youths) Enrolment")
+            age_5_17_df = states_board.top('age_5_17', 10)
+            st.dataframe(age_5_17_df)
+            st.markdown("---")
+
+        with col3:
+            st.subheader("Top 10 State In (Adults) Enrolment")
+            age_18_greater_df = states_board.top('age_18_greater', 10)
+            st.dataframe(age_18_greater_df)
+            st.markdown("---")
 
 
 
@@ -104,38 +208,7 @@ if option == "Overall Analysis":
     # adding graphs
     # st.subheader("State Wise 0-5 Registration")
 
-    state_age05 = (
-        df.groupby('state')['age_0_5']
-        .sum()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
-
-    # ---------- Plotly bar chart ----------
-    fig = px.bar(
-        state_age05,
-        x='state',
-        y='age_0_5',
-        title="State-wise Age 0–5 Registrations",
-        labels={
-            'state': 'State',
-            'age_0_5': 'Registrations'
-        },
-        text_auto=True,
-        template='plotly_white'
-    )
-
-    # ---------- Layout tuning ----------
-    fig.update_layout(
-        title=dict(x=0.5, font=dict(size=24)),
-        xaxis_title=dict(text="State", font=dict(size=16)),
-        yaxis_title=dict(text="Registrations", font=dict(size=16)),
-        xaxis_tickfont=dict(size=12),
-        yaxis_tickfont=dict(size=12),
-        height=700
-    )
-
-    fig.update_xaxes(tickangle=90)
+    fig = cached_figure("overall", charts.state_age_bar, 'age_0_5')
 
     # ---------- Show in Streamlit ----------
     st.subheader("State-wise Age 0–5 Registration Analysis")
@@ -147,38 +220,7 @@ if option == "Overall Analysis":
 
 
     # second graph
-    state_age_5_17 = (
-        df.groupby('state')['age_5_17']
-        .sum()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
-
-    # ---------- Plotly bar chart ----------
-    fig = px.bar(
-        state_age_5_17,
-        x='state',
-        y='age_5_17',
-        title="State-wise Age 5_17 Registrations",
-        labels={
-            'state': 'State',
-            'age_5_17': 'Registrations'
-        },
-        text_auto=True,
-        template='plotly_white'
-    )
-
-    # ---------- Layout tuning ----------
-    fig.update_layout(
-        title=dict(x=0.5, font=dict(size=24)),
-        xaxis_title=dict(text="State", font=dict(size=16)),
-        yaxis_title=dict(text="Registrations", font=dict(size=16)),
-        xaxis_tickfont=dict(size=12),
-        yaxis_tickfont=dict(size=12),
-        height=700
-    )
-
-    fig.update_xaxes(tickangle=90)
+    fig = cached_figure("overall", charts.state_age_bar, 'age_5_17')
     st.markdown("---")
 
 
@@ -193,38 +235,7 @@ if option == "Overall Analysis":
 
 
     # third
-    state_age18 = (
-        df.groupby('state')['age_18_greater']
-        .sum()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
-
-    # ---------- Plotly bar chart ----------
-    fig = px.bar(
-        state_age18,
-        x='state',
-        y='age_18_greater',
-        title="State-wise Age 18+ Registrations",
-        labels={
-            'state': 'State',
-            'age_18_greater': 'Registrations'
-        },
-        text_auto=True,
-        template='plotly_white'
-    )
-
-    # ---------- Layout tuning ----------
-    fig.update_layout(
-        title=dict(x=0.5, font=dict(size=24)),
-        xaxis_title=dict(text="State", font=dict(size=16)),
-        yaxis_title=dict(text="Registrations", font=dict(size=16)),
-        xaxis_tickfont=dict(size=12),
-        yaxis_tickfont=dict(size=12),
-        height=700
-    )
-
-    fig.update_xaxes(tickangle=90)
+    fig = cached_figure("overall", charts.state_age_bar, 'age_18_greater')
     st.markdown("---")
 
     # third graph
@@ -264,39 +275,7 @@ if option == "Overall Analysis":
 
     # ---------------- Monthly stacked bar ----------------
     st.subheader("Monthly stacked bar")
-    monthly_summary = (
-        df.groupby("month")[["age_0_5", "age_5_17", "age_18_greater"]]
-        .sum()
-        .reset_index()
-    )
-
-    fig2 = px.bar(
-        monthly_summary,
-        x="month",
-        y=["age_0_5", "age_5_17", "age_18_greater"],
-        title="Monthly Registration Distribution by Age Group",
-        labels={
-            "value": "Number of Registrations",
-            "month": "Month",
-            "variable": "Age Group"
-        },
-        template="plotly_white"
-    )
-
-    fig2.for_each_trace(lambda t: t.update(
-        name={
-            "age_0_5": "Age 0–5",
-            "age_5_17": "Age 5–17",
-            "age_18_greater": "Age 18+"
-        }[t.name]
-    ))
-
-    fig2.update_layout(
-        barmode="stack",
-        title=dict(x=0.5),
-        xaxis_title="Month",
-        yaxis_title="Number of Registrations"
-    )
+    fig2 = cached_figure("overall", charts.monthly_stacked_bar)
 
     st.plotly_chart(fig2, use_container_width=True)
     st.markdown("""
@@ -348,56 +327,8 @@ if option == "Overall Analysis":
 
     st.subheader("Month-wise Registration Trend by Age Group")
 
-    # Prepare month-wise data
-    monthly_line = (
-        df.groupby("month")[["age_0_5", "age_5_17", "age_18_greater"]]
-        .sum()
-        .reset_index()
-    )
-
-    # (Optional but recommended) Month order fix
-    month_order = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
-
-    monthly_line["month"] = pd.Categorical(
-        monthly_line["month"],
-        categories=month_order,
-        ordered=True
-    )
-
-    monthly_line = monthly_line.sort_values("month")
-
-    # Line chart (stock style)
-    fig3 = px.line(
-        monthly_line,
-        x="month",
-        y=["age_0_5", "age_5_17", "age_18_greater"],
-        markers=True,
-        labels={
-            "value": "Number of Registrations",
-            "month": "Month",
-            "variable": "Age Group"
-        },
-        title="Month-wise Registration Trend (Age Groups)",
-        template="plotly_white"
-    )
-
-    # Clean legend names
-    fig3.for_each_trace(lambda t: t.update(
-        name={
-            "age_0_5": "Age 0–5",
-            "age_5_17": "Age 5–17",
-            "age_18_greater": "Age 18+"
-        }[t.name]
-    ))
-
-    fig3.update_layout(
-        title=dict(x=0.5),
-        xaxis_title="Month",
-        yaxis_title="Number of Registrations"
-    )
+    # Line chart (stock style), months in calendar order
+    fig3 = cached_figure("overall", charts.monthly_trend_line)
 
     st.plotly_chart(fig3, use_container_width=True)
 
@@ -409,357 +340,160 @@ elif option == "Important Observations":
 elif option == 'State Wise Analysis':
     st.title("State Wise Analysis")
 
-    states = sorted(df['state'].unique())
-    months = sorted(df['month'].unique())
+    states = queries.states()
+    months = queries.months()
     # days = sorted(df['days'].unique())
 
     # n = df.groupby([states])['age_0_5'].sum().reset_index().sort_values('age_0_5', ascending=False).head(10)
     # st.dataframe(n)
 
     selected_state = st.sidebar.selectbox("Select State", states)
-    selected_month = st.sidebar.selectbox("Select Month", months)
-    state_df = df[df["state"] == selected_state]
-    month_df = state_df[state_df["month"] == selected_month]
 
+    # the month feeds the pie and bar only: its selector sits in a fragment with
+    # them, so changing it reruns these two charts and nothing else
+    @profiled_fragment
+    def state_month_section(selected_state):
+        selected_month = st.selectbox("Select Month", months)
 
+        st.subheader(f"Total Age Wise Registrations In ({selected_state}) In ({selected_month})")
 
+        col1 ,col2 = st.columns(2)
+        with col1:
+            fig = cached_figure("state", charts.age_pie, selected_state, selected_month)
+            st.plotly_chart(fig, use_container_width=True)
 
-    total_df = month_df[['age_0_5', 'age_5_17', 'age_18_greater']].sum().reset_index()
-    f_df = total_df.rename(columns={
-        'index': 'Age Group',
-        0: 'No of Registration'
-    })
+        with col2:
+            show_pyplot(charts.age_bar, selected_state, selected_month)
 
-    st.subheader(f"Total Age Wise Registrations In ({selected_state}) In ({selected_month})")
-
-    col1 ,col2 = st.columns(2)
-    with col1:
-        fig = px.pie(
-            f_df,
-            names="Age Group",
-            values="No of Registration",
-            title=f"Age-wise Distribution ({selected_month})",
-            template="plotly_white"
-        )
-
-        # ✅ labels + percent + COLOR FIX
-        fig.update_traces(
-            textinfo="percent+label",
-            textfont=dict(
-                size=25,
-                color="black"  # ⭐ IMPORTANT LINE
-            ),
-            marker=dict(line=dict(color="white", width=2))
-        )
-
-        # ✅ force pure white background
-        fig.update_layout(
-            title=dict(x=0.5),
-            paper_bgcolor="white",
-            plot_bgcolor="white",
-            margin=dict(t=60, b=40, l=40, r=40),
-            legend=dict(
-                bgcolor="white",
-                bordercolor="lightgray",
-                borderwidth=1,
-                font=dict(color="black")  # legend text bhi clear
-            )
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        fig, ax = plt.subplots()
-
-        ax.bar(
-            f_df["Age Group"],
-            f_df["No of Registration"]
-        )
-
-        ax.set_title("Age-wise Registration Distribution")
-        ax.set_xlabel("Age Group")
-        ax.set_ylabel("No of Registration")
-
-        # value labels
-        for i, v in enumerate(f_df["No of Registration"]):
-            ax.text(i, v, f"{v:,}", ha="center", va="bottom")
-
-        st.pyplot(fig)
-
-    # month wise line chart
-    month_order = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
-
-    state_df['month'] = pd.Categorical(
-        state_df['month'],
-        categories=month_order,
-        ordered=True
-    )
-
-    m1 = (
-        state_df
-        .groupby('month')[['age_0_5', 'age_5_17', 'age_18_greater']]
-        .sum()
-        .reset_index()
-        .sort_values('month')
-    )
+    state_month_section(selected_state)
 
+    # month wise line chart (calendar order)
     st.subheader(f'State Wise Monthly Line Distribution in ({selected_state})')
-
-    fig, ax = plt.subplots(figsize=(10, 5))
-
-    ax.plot(m1["month"], m1["age_0_5"], marker="o", label="Age 0–5")
-    ax.plot(m1["month"], m1["age_5_17"], marker="o", label="Age 5–17")
-    ax.plot(m1["month"], m1["age_18_greater"], marker="o", label="Age 18+")
-
-    ax.set_title("Month-wise Registration Trend by Age Group")
-    ax.set_xlabel("Month")
-    ax.set_ylabel("Registrations")
-    ax.tick_params(axis='x', rotation=90)
-
-
-    ax.legend()
-    ax.grid(alpha=0.3)
-
-    st.pyplot(fig)
+    show_pyplot(charts.state_monthly_line, selected_state)
 
     # sunburst plot
     st.subheader('Sunbrust Plot (Month -> State -> Age Group)')
-    sun_df = df.melt(
-        id_vars=["month", "state"],
-        value_vars=["age_0_5", "age_5_17", "age_18_greater"],
-        var_name="Age Group",
-        value_name="Registrations"
-    )
-
-    sun_df["Age Group"] = sun_df["Age Group"].map({
-        "age_0_5": "Age 0–5",
-        "age_5_17": "Age 5–17",
-        "age_18_greater": "Age 18+"
-    })
-
-    fig = px.sunburst(
-        sun_df,
-        path=["month", "state", "Age Group"],
-        values="Registrations",
-        title="Month-wise Aadhaar Registration Distribution",
-        template="plotly_white"
-    )
-    fig.update_layout(
-        width=1500,
-        height=700,
-        title=dict(x=0.5),
-        plot_bgcolor="white",  # plot area
-        paper_bgcolor="white",  # outer background
-    )
+    st.plotly_chart(snapshot.sunburst, use_container_width=True)
 
-    st.plotly_chart(fig, use_container_width=True)
 
-
-    # day wise registration
-    days_df = df[df['state'] == 'Chandigarh'].groupby('days')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().reset_index()
-    # ---------- day order ----------
-    day_order = [
-        "Monday", "Tuesday", "Wednesday",
-        "Thursday", "Friday", "Saturday", "Sunday"
-    ]
-
-    # ---------- prepare day-wise data ----------
-    state_df['days'] = pd.Categorical(
-        state_df['days'],
-        categories=day_order,
-        ordered=True
-    )
-
-    d1 = (
-        state_df
-        .groupby('days')[['age_0_5', 'age_5_17', 'age_18_greater']]
-        .sum()
-        .reset_index()
-        .sort_values('days')
-    )
-
-    # ---------- plot ----------
+    # day wise registration (weekday order)
     st.subheader(f"State Wise And Day-wise Registration Distribution in ({selected_state})")
+    show_pyplot(charts.state_weekday_line, selected_state)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
 
-    ax.plot(d1["days"], d1["age_0_5"], marker="o", label="Age 0–5")
-    ax.plot(d1["days"], d1["age_5_17"], marker="o", label="Age 5–17")
-    ax.plot(d1["days"], d1["age_18_greater"], marker="o", label="Age 18+")
 
-    ax.set_title("Day-wise Registration Trend by Age Group")
-    ax.set_xlabel("Day")
-    ax.set_ylabel("Registrations")
 
-    ax.tick_params(axis='x', rotation=45)
-    ax.legend()
-    ax.grid(alpha=0.3)
 
-    st.pyplot(fig)
-    plt.close(fig)
+elif option == 'District Wise Analysis':
+    st.title("District Wise Analysis")
 
+    # ---------------- state selector ----------------
+    states = queries.states()
+    selected_state = st.sidebar.selectbox("Select State", states)
 
+    # Everything district-level reads the district selector, the top/bottom 10
+    # charts only the state, so the district sections form one fragment (with
+    # their selector) and the state-level charts are drawn after it: switching
+    # district reruns the fragment alone.
+    @profiled_fragment
+    def district_section(selected_state):
+        # ---------------- district selector (based on selected state) ----------------
+        districts = queries.districts(selected_state)
+
+        selected_district = st.selectbox(
+            "Select District",
+            districts
+        )
 
+        st.subheader(f"District Overview – {selected_district} ({selected_state})")
 
+        # ---------------- district totals vs. state average per district ----------------
+        with active_profiler().section("district vs state"):
+            comparison = queries.district_vs_state(selected_state, selected_district)
 
-elif option == 'District Wise Analysis':
-    st.title("District Wise Analysis")
+        curr_0_5 = comparison.totals.age_0_5
+        curr_5_17 = comparison.totals.age_5_17
+        curr_18 = comparison.totals.age_18_greater
 
-    # ---------------- state selector ----------------
-    states = sorted(df["state"].unique())
-    selected_state = st.sidebar.selectbox("Select State", states)
+        # ---------------- percentage change ----------------
+        p0 = comparison.pct_change["age_0_5"]
+        p1 = comparison.pct_change["age_5_17"]
+        p2 = comparison.pct_change["age_18_greater"]
 
-    # ---------------- Filter selected state ----------------
-    state_df = df[df["state"] == selected_state]
+        # ---------------- cards layout ----------------
+        c1, c2, c3 = st.columns(3)
 
-    # ---------------- district selector (based on selected state) ----------------
-    districts = sorted(state_df["district"].unique())
+        with c1:
+            st.metric(
+                label="Age 0–5 Registrations",
+                value=f"{curr_0_5:,}",
+                delta=f"{p0:.2f}%"
+            )
 
-    selected_district = st.sidebar.selectbox(
-        "Select District",
-        districts
-    )
+        with c2:
+            st.metric(
+                label="Age 5–17 Registrations",
+                value=f"{curr_5_17:,}",
+                delta=f"{p1:.2f}%"
+            )
 
-    # ---------------- Filter selected district ----------------
-    district_df = state_df[state_df["district"] == selected_district]
+        with c3:
+            st.metric(
+                label="Age 18+ Registrations",
+                value=f"{curr_18:,}",
+                delta=f"{p2:.2f}%"
+            )
 
-    st.subheader(f"District Overview – {selected_district} ({selected_state})")
 
-    # ---------------- current district totals ----------------
-    curr_0_5 = district_df["age_0_5"].sum()
-    curr_5_17 = district_df["age_5_17"].sum()
-    curr_18 = district_df["age_18_greater"].sum()
+        st.markdown('-------')
 
-    # ---------------- state-level baseline (average per district) ----------------
-    state_group = (
-        state_df
-        .groupby("district")[["age_0_5", "age_5_17", "age_18_greater"]]
-        .sum()
-    )
+        st.subheader(f"Month-wise Age Group Registration Sum ({selected_district}, {selected_state})" )
+        fig = cached_figure("district", charts.district_monthly_line, selected_state, selected_district)
 
-    avg_0_5 = state_group["age_0_5"].mean()
-    avg_5_17 = state_group["age_5_17"].mean()
-    avg_18 = state_group["age_18_greater"].mean()
+        st.plotly_chart(fig, use_container_width=True)
 
+        st.markdown("---")
 
-    # ---------------- percentage change ----------------
-    def pct_change(curr, base):
-        if base == 0:
-            return 0
-        return ((curr - base) / base) * 100
 
+        st.subheader(f"Age Group Dominance – {selected_district}")
+        fig = cached_figure("district", charts.district_radar, selected_state, selected_district)
 
-    p0 = pct_change(curr_0_5, avg_0_5)
-    p1 = pct_change(curr_5_17, avg_5_17)
-    p2 = pct_change(curr_18, avg_18)
+        st.plotly_chart(fig, use_container_width=True)
 
-    # ---------------- cards layout ----------------
-    c1, c2, c3 = st.columns(3)
+        st.markdown("---")
 
-    with c1:
-        st.metric(
-            label="Age 0–5 Registrations",
-            value=f"{curr_0_5:,}",
-            delta=f"{p0:.2f}%"
-        )
 
-    with c2:
-        st.metric(
-            label="Age 5–17 Registrations",
-            value=f"{curr_5_17:,}",
-            delta=f"{p1:.2f}%"
-        )
 
-    with c3:
+        rank = comparison.rank_0_5
+        total = comparison.districts
+
         st.metric(
-            label="Age 18+ Registrations",
-            value=f"{curr_18:,}",
-            delta=f"{p2:.2f}%"
+            label="District Rank (Age 0–5)",
+            value=f"{rank} / {total}"
         )
 
+        st.markdown("---")
 
-    st.markdown('-------')
+    district_section(selected_state)
 
     col1, col2 ,col3 = st.columns(3)
 
-    import plotly.express as px
-
     with col1:
         st.subheader(f"Top 10 Districts in ({selected_state}) – Age 0–5")
 
-        top_0_5 = (
-            state_df
-            .groupby("district")["age_0_5"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_0_5", ascending=False)
-            .head(10)
-        )
-
-        fig = px.bar(
-            top_0_5,
-            x="district",
-            y="age_0_5",
-            text_auto=True,
-            title="Top 10 Districts (Age 0–5)",
-            labels={"district": "District", "age_0_5": "Registrations"},
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_top_bar, selected_state, "age_0_5")
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.subheader(f"Top 10 Districts in ({selected_state}) – Age 5–17")
 
-        top_5_17 = (
-            state_df
-            .groupby("district")["age_5_17"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_5_17", ascending=False)
-            .head(10)
-        )
-
-        fig = px.bar(
-            top_5_17,
-            x="district",
-            y="age_5_17",
-            text_auto=True,
-            title="Top 10 Districts (Age 5–17)",
-            labels={"district": "District", "age_5_17": "Registrations"},
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_top_bar, selected_state, "age_5_17")
         st.plotly_chart(fig, use_container_width=True)
 
     with col3:
         st.subheader(f"Top 10 Districts in ({selected_state}) – Age 18+")
 
-        top_18 = (
-            state_df
-            .groupby("district")["age_18_greater"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_18_greater", ascending=False)
-            .head(10)
-        )
-
-        fig = px.bar(
-            top_18,
-            x="district",
-            y="age_18_greater",
-            text_auto=True,
-            title="Top 10 Districts (Age 18+)",
-            labels={"district": "District", "age_18_greater": "Registrations"},
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_top_bar, selected_state, "age_18_greater")
         st.plotly_chart(fig, use_container_width=True)
 
     st.markdown("---")
@@ -769,152 +503,44 @@ elif option == 'District Wise Analysis':
     with col1:
         st.subheader(f"Bottom 10 Districts in ({selected_state}) – Age 0–5")
 
-        bottom_0_5 = (
-            state_df
-            .groupby("district")["age_0_5"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_0_5", ascending=True)
-            .head(10)
-        )
-
-        fig = px.bar(
-            bottom_0_5,
-            x="district",
-            y="age_0_5",
-            text_auto=True,
-            title="Bottom 10 Districts (Age 0–5)",
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_bottom_bar, selected_state, "age_0_5")
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.subheader(f"Bottom 10 Districts in ({selected_state}) – Age 5-17")
 
-        bottom_0_5 = (
-            state_df
-            .groupby("district")["age_5_17"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_5_17", ascending=True)
-            .head(10)
-        )
-
-        fig = px.bar(
-            bottom_0_5,
-            x="district",
-            y="age_5_17",
-            text_auto=True,
-            title="Bottom 10 Districts (Age 5-17)",
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_bottom_bar, selected_state, "age_5_17")
         st.plotly_chart(fig, use_container_width=True)
 
 
     with col3:
         st.subheader(f"Bottom 10 Districts in ({selected_state}) – Age 18+")
 
-        bottom_0_5 = (
-            state_df
-            .groupby("district")["age_18_greater"]
-            .sum()
-            .reset_index()
-            .sort_values(by="age_18_greater", ascending=True)
-            .head(10)
-        )
-
-        fig = px.bar(
-            bottom_0_5,
-            x="district",
-            y="age_18_greater",
-            text_auto=True,
-            title="Bottom 10 Districts (Age 18+)",
-            template="plotly_white"
-        )
-
-        fig.update_layout(xaxis_tickangle=-45)
+        fig = cached_figure("district", charts.district_bottom_bar, selected_state, "age_18_greater")
         st.plotly_chart(fig, use_container_width=True)
 
     st.markdown("---")
 
 
-
-
-
-
-
-    # ---------------- Convert to long format (for plotly) ----------------
-    st.subheader(f"Month-wise Age Group Registration Sum ({selected_district}, {selected_state})" )
-    month_df = (
-        district_df
-        .groupby("month")[["age_0_5", "age_5_17", "age_18_greater"]]
-        .sum()
-        .reset_index()
-    )
-
-    month_long = month_df.melt(
-        id_vars="month",
-        value_vars=["age_0_5", "age_5_17", "age_18_greater"],
-        var_name="Age Group",
-        value_name="Registrations"
-    )
-
-    fig = px.line(
-        month_long,
-        x="month",
-        y="Registrations",
-        color="Age Group",
-        markers=True,
-        title=f"Month-wise Age Group Registration Sum ({selected_district}, {selected_state})",
-        template="plotly_white"
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.markdown("---")
-
-
-    st.subheader(f"Age Group Dominance – {selected_district}")
-    radar_df = pd.DataFrame({
-        "Age Group": ["Age 0–5", "Age 5–17", "Age 18+"],
-        "District": [curr_0_5, curr_5_17, curr_18],
-        "State Avg": [avg_0_5, avg_5_17, avg_18]
-    })
-
-    fig = px.line_polar(
-        radar_df,
-        r="District",
-        theta="Age Group",
-        line_close=True,
-        title=f"Age Group Dominance – {selected_district}"
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.markdown("---")
-
-
-
-    rank_df = (
-        state_df
-        .groupby("district")["age_0_5"]
-        .sum()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
-
-    rank = rank_df[rank_df["district"] == selected_district].index[0] + 1
-    total = len(rank_df)
-
-    st.metric(
-        label="District Rank (Age 0–5)",
-        value=f"{rank} / {total}"
-    )
-
-    st.markdown("---")
-
-
+# the process's first full render is part of its start-up timings
+boot.record_first_render(option, profiler.elapsed_ms() / 1000)
+
+if profiler.enabled:
+    # ---------------- profiling panel (this rerun) ----------------
+    with st.sidebar.expander("Profiling", expanded=True):
+        st.caption(f"Rerun {profiler.run_id}: {profiler.elapsed_ms():.0f} ms, logged to {PROFILE_LOG}")
+        st.dataframe(profiler.frame().round(1), hide_index=True)
+        if not profiler.measures_memory:
+            st.caption("Memory not measured: another profiled rerun holds tracemalloc.")
+        st.caption("Snapshot build (s): " + ", ".join(
+            f"{stage} {seconds:.2f}" for stage, seconds in snapshot.timings.items()
+        ))
+        st.caption("Start-up (s): " + ", ".join(
+            f"{stage} {seconds:.2f}" for stage, seconds in boot.report().items()
+        ))
+        st.caption(f"Figure cache: {figure_cache().stats()}")
+        st.caption(f"Image cache: {image_cache().stats()}")
+        if boot.result_cache() is not None:
+            st.caption(f"Result cache (all workers): {boot.result_cache().stats()}")
+
+profiler.close()
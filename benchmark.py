@@ -0,0 +1,314 @@
+"""Benchmarks of the dashboard's hot paths on synthetic data.
+
+    python benchmark.py --sizes 1M,10M,50M --out bench-results.json
+    python benchmark.py --sizes 1M --baseline bench-results.json
+
+First the cold start of a server process is timed: a fresh interpreter
+importing what app.py imports, and each plotting backend charts.py imports on
+first use (rows 0 in the results). Then for every size a synthetic CSV is
+generated once (synthetic.py, kept under --data-dir) and each step is timed
+--repeats times:
+
+- load: parsing the CSV into the compact frame (cold, no columnar cache),
+  reading it back from the Parquet cache (warm), building the cube from the
+  frame, streaming the cube straight from the CSV, summing it with DuckDB
+  (when installed), mapping it from its column store, and indexing/warming
+  the query layer, from scratch and from a filled on-disk result cache;
+- per page: the aggregations the page reads and, separately, building its
+  figures (Plotly ones serialized like st.plotly_chart does, Matplotlib ones
+  rendered to PNG).
+
+Every page step starts from a fresh EnrolmentQueries so memoization doesn't
+hide the work, and the figure steps run with the aggregations already
+computed, so they time the figures alone. After the timed runs each step runs
+once more under tracemalloc for its peak allocation (numpy and pandas
+buffers included; pyarrow's own allocator is not seen by it).
+
+Results are written as JSON. With --baseline, steps whose median got slower
+than --threshold times the baseline are listed and the exit status is 1.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import charts
+import synthetic
+from analytics import EnrolmentQueries
+from caching import DiskCache
+from ingest import (
+    AGE_COLS,
+    aggregate_cube,
+    duckdb_cube,
+    freeze_frame,
+    read_columns,
+    read_enrolment,
+    source_fingerprints,
+    stream_cube,
+    write_columns,
+)
+
+
+def _selection(queries):
+    # the busiest state, its busiest district and the peak month: the
+    # selections with the most rows behind them
+    state = queries.state_leaderboard().top("age_0_5", 1)["state"].iloc[0]
+    district = queries.district_leaderboard(state).top("age_0_5", 1)["district"].iloc[0]
+    month = queries.monthly_trend().set_index("month")[AGE_COLS].sum(axis=1).idxmax()
+    return state, district, month
+
+
+def overall_aggregate(q, state, district, month):
+    q.age_totals(month=month).percentages()
+    board = q.state_leaderboard()
+    for col in AGE_COLS:
+        board.top(col, 10)
+        board.top(col, None)
+    q.monthly_trend()
+
+
+def overall_figures(q, state, district, month):
+    for col in AGE_COLS:
+        charts.state_age_bar(q, col).to_json()
+    charts.monthly_stacked_bar(q).to_json()
+    charts.monthly_trend_line(q).to_json()
+
+
+def state_aggregate(q, state, district, month):
+    q.age_totals(state=state, month=month).as_frame()
+    q.monthly_trend(state=state)
+    q.weekday_trend(state=state)
+    q.sunburst_table()
+
+
+def state_figures(q, state, district, month):
+    charts.age_pie(q, state, month).to_json()
+    charts.render_png(charts.age_bar(q, state, month))
+    charts.render_png(charts.state_monthly_line(q, state))
+    charts.render_png(charts.state_weekday_line(q, state))
+    charts.sunburst(q).to_json()
+
+
+def district_aggregate(q, state, district, month):
+    q.district_vs_state(state, district)
+    board = q.district_leaderboard(state)
+    for col in AGE_COLS:
+        board.top(col, 10)
+        board.bottom(col, 10)
+    q.monthly_trend(state=state, district=district)
+
+
+def district_figures(q, state, district, month):
+    for col in AGE_COLS:
+        charts.district_top_bar(q, state, col).to_json()
+        charts.district_bottom_bar(q, state, col).to_json()
+    charts.district_monthly_line(q, state, district).to_json()
+    charts.district_radar(q, state, district).to_json()
+
+
+PAGES = {
+    "overall": (overall_aggregate, overall_figures),
+    "state": (state_aggregate, state_figures),
+    "district": (district_aggregate, district_figures),
+}
+
+# step -> statement run in a fresh interpreter; the bare interpreter is the
+# floor the others include
+STARTUP_IMPORTS = {
+    "startup.interpreter": "pass",
+    "startup.import_app": "import streamlit, boot",
+    "startup.import_plotly": "import plotly.express",
+    "startup.import_matplotlib": "import matplotlib.figure",
+}
+
+
+def measure(run, setup=lambda: None, repeats=3, memory=True):
+    """Time ``run(setup())`` ``repeats`` times; ``setup`` is not timed."""
+    seconds = []
+    for _ in range(repeats):
+        arg = setup()
+        started = time.perf_counter()
+        run(arg)
+        seconds.append(time.perf_counter() - started)
+    result = {
+        "median_s": statistics.median(seconds),
+        "min_s": min(seconds),
+        "max_s": max(seconds),
+        "repeats": repeats,
+    }
+    if memory:
+        arg = setup()
+        tracemalloc.start()
+        try:
+            run(arg)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _max_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def dataset(rows, data_dir, seed):
+    path = os.path.join(data_dir, f"synthetic_{rows}_s{seed}.csv")
+    if not os.path.exists(path):
+        print(f"generating {rows:,} rows -> {path}", flush=True)
+        synthetic.write_csv(path, rows, seed=seed)
+    return path
+
+
+def bench_startup(repeats, report):
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, statement in STARTUP_IMPORTS.items():
+        result = measure(
+            lambda _: subprocess.run([sys.executable, "-c", statement], check=True, cwd=here),
+            repeats=repeats, memory=False,
+        )
+        result.update(rows=0, step=name)
+        report(result)
+
+
+def bench_size(rows, path, repeats, memory, report):
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+
+    def step(name, run, setup=lambda: None):
+        result = measure(run, setup, repeats, memory)
+        result.update(rows=rows, step=name)
+        report(result)
+
+    def cold_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        step("load.read_csv_cold", lambda _: read_enrolment(path, cache_dir), cold_cache)
+        read_enrolment(path, cache_dir)
+        step("load.read_cache_warm", lambda _: read_enrolment(path, cache_dir))
+        df = read_enrolment(path, cache_dir)
+        step("load.aggregate_cube", lambda _: aggregate_cube(df))
+        step("load.stream_cube", lambda _: stream_cube(path))
+        if importlib.util.find_spec("duckdb") is not None:
+            step("load.duckdb_cube", lambda _: duckdb_cube(path))
+        write_columns(aggregate_cube(df), path, source_fingerprints(path), cache_dir)
+        step("load.read_columns", lambda _: read_columns(path, cache_dir))
+        cube = freeze_frame(aggregate_cube(df))
+        df = None  # only the cube is needed from here on
+        step("load.queries_warm", lambda _: EnrolmentQueries(cube).warm())
+        results = DiskCache(os.path.join(cache_dir, "results.sqlite"), 1 << 30)
+        EnrolmentQueries(cube, results).warm()
+        step("load.queries_warm_disk", lambda _: EnrolmentQueries(cube, results).warm())
+
+        selection = _selection(EnrolmentQueries(cube))
+
+        def fresh():
+            return EnrolmentQueries(cube)
+
+        for page, (aggregate, figures) in PAGES.items():
+            step(f"{page}.aggregate", lambda q: aggregate(q, *selection), fresh)
+
+            def prepared(aggregate=aggregate):
+                q = fresh()
+                aggregate(q, *selection)
+                return q
+
+            step(f"{page}.figures", lambda q: figures(q, *selection), prepared)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return {"rows": rows, "cube_rows": len(cube), "max_rss_mb": _max_rss_mb()}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """(rows, step, baseline s, current s) of every step slower than ``threshold`` x baseline."""
+    before = {(r["rows"], r["step"]): r["median_s"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = before.get((r["rows"], r["step"]))
+        if old and r["median_s"] > old * threshold:
+            regressions.append((r["rows"], r["step"], old, r["median_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's hot paths.")
+    parser.add_argument("--sizes", default="1M", help="comma separated row counts, e.g. 1M,10M,50M")
+    parser.add_argument("--data-dir", default=".bench-data", help="where generated CSVs are kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak runs")
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown factor reported as a regression")
+    args = parser.parse_args(argv)
+
+    results, sizes = [], []
+
+    def report(result):
+        results.append(result)
+        peak = f", peak {result['peak_mb']:.0f} MB" if "peak_mb" in result else ""
+        print(f"{result['rows']:>12,} {result['step']:<26} "
+              f"{result['median_s'] * 1000:10.1f} ms{peak}", flush=True)
+
+    bench_startup(args.repeats, report)
+    for rows in map(synthetic.parse_rows, args.sizes.split(",")):
+        path = dataset(rows, args.data_dir, args.seed)
+        sizes.append(bench_size(rows, path, args.repeats, not args.no_memory, report))
+
+    payload = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+        },
+        "sizes": sizes,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+        for rows, step, old, new in regressions:
+            print(f"REGRESSION {rows:,} {step}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms "
+                  f"({new / old:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
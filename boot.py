@@ -0,0 +1,204 @@
+"""Start-up of the dashboard: the shared dataset store and its boot-time prewarm.
+
+    python boot.py                        # prewarm, then serve app.py
+    python boot.py --server.port 8502     # options go on to `streamlit run`
+
+`streamlit run app.py` works too, but then the data is loaded by the first
+session that arrives. Launched through this module the process loads the
+data, precomputes the aggregates of every page (EnrolmentQueries.warm) and
+builds the sunburst before Streamlit opens its port, so no visitor ever
+waits for the dataset.
+
+Query results, the sunburst and the figures the pages render are cached on
+disk as well (result_cache()), keyed by the content hash of the cube and a
+hash of the code, so a restarted or redeployed server on unchanged data finds
+them already computed instead of every worker recomputing them at once.
+
+Start-up is timed as it goes: the prewarm, every plotting backend the charts
+import on first use (profiling.IMPORT_SECONDS) and the first full render of
+a page. report() collects them; they are logged and shown in the profiling
+panel. The cold import times of the modules themselves are tracked by
+benchmark.py.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import analytics
+import charts
+import ingest
+from analytics import EnrolmentQueries
+from caching import DiskCache
+from ingest import CACHE_DIR, DEFAULT_MAX_MEMORY_MB, source_signature
+from profiling import IMPORT_SECONDS
+from store import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# AADHAAR_SOURCE may point at a CSV or a directory of CSVs; a directory (or
+# AADHAAR_STREAMING=1) builds the cube chunk by chunk without the raw frame and
+# keeps it on disk, so a new CSV dropped into the directory is parsed on its own
+DATA_SOURCE = os.environ.get("AADHAAR_SOURCE", 'cleaned_aadhaar_enrolment.csv')
+STREAMING = os.environ.get("AADHAAR_STREAMING") == "1" or os.path.isdir(DATA_SOURCE)
+MAX_MEMORY_MB = int(os.environ.get("AADHAAR_MAX_MEMORY_MB", DEFAULT_MAX_MEMORY_MB))
+# AADHAAR_ENGINE=duckdb sums the raw rows on all cores with DuckDB (if installed)
+ENGINE = os.environ.get("AADHAAR_ENGINE", "pandas")
+
+# Everything the pages read from the data lives in one Snapshot, built by a
+# background worker (store.DatasetStore) and shared read-only by every session,
+# so page code must never assign into it (derive new frames instead). When the
+# source changes the worker builds the next snapshot while sessions keep
+# reading the previous one, then swaps it in.
+REFRESH_SECONDS = float(os.environ.get("AADHAAR_REFRESH_SECONDS", 30))
+
+# Query results and serialized figures are also kept in a SQLite file shared by
+# every worker process on the host, so a restart or a deploy starts from what
+# the previous processes computed; AADHAAR_RESULT_CACHE_MB=0 turns it off
+RESULT_CACHE_PATH = os.environ.get("AADHAAR_RESULT_CACHE", os.path.join(CACHE_DIR, "results.sqlite"))
+RESULT_CACHE_MB = int(os.environ.get("AADHAAR_RESULT_CACHE_MB", 256))
+
+# start-up stage -> seconds, filled in as the process boots
+TIMINGS = {}
+_lock = threading.Lock()
+_store = None
+_first_render = None
+_result_lock = threading.Lock()
+_result_cache = None
+_result_cache_opened = False
+
+
+class Snapshot(NamedTuple):
+    signature: tuple
+    queries: EnrolmentQueries
+    sunburst: object
+    # seconds spent on each build stage, shown by the profiling panel
+    timings: dict
+
+
+def _code_version():
+    # results depend on the code that computed them as much as on the data: a
+    # deploy that changes any of these modules starts a fresh namespace
+    sha = hashlib.sha1()
+    for module in (ingest, analytics, charts):
+        with open(module.__file__, "rb") as fh:
+            sha.update(fh.read())
+    return sha.hexdigest()[:16]
+
+
+def result_cache():
+    """The on-disk result cache (caching.DiskCache), or None when it is off or unusable."""
+    global _result_cache, _result_cache_opened
+    with _result_lock:
+        if not _result_cache_opened:
+            _result_cache_opened = True
+            if RESULT_CACHE_MB > 0:
+                try:
+                    _result_cache = DiskCache(RESULT_CACHE_PATH, RESULT_CACHE_MB * 1024 * 1024,
+                                              namespace=_code_version())
+                except (OSError, sqlite3.Error) as exc:
+                    logger.warning("result cache %s is unusable, computing everything: %s",
+                                   RESULT_CACHE_PATH, exc)
+    return _result_cache
+
+
+def cached(key, compute):
+    """``compute()``, through the on-disk result cache when there is one."""
+    cache = result_cache()
+    return compute() if cache is None else cache.get_or_compute(key, compute)
+
+
+def build_snapshot(signature):
+    # runs on the rebuild worker: loads the data and precomputes the queries of
+    # every page for every state, so no session computes any of it inline
+    # (after a restart they mostly come back from the result cache)
+    timings = {}
+    started = time.perf_counter()
+    queries = EnrolmentQueries.from_source(DATA_SOURCE, STREAMING, MAX_MEMORY_MB, ENGINE,
+                                           result_cache=result_cache())
+    timings["load"] = time.perf_counter() - started
+    queries.version  # hash the cube here rather than on the first chart cache lookup
+    queries.warm()
+    timings["warm"] = time.perf_counter() - started - timings["load"]
+    # kept as its JSON spec, which st.plotly_chart takes as is
+    sunburst = json.loads(cached(("sunburst", queries.version),
+                                 lambda: charts.sunburst(queries).to_json()))
+    timings["sunburst"] = time.perf_counter() - started - timings["load"] - timings["warm"]
+    return Snapshot(signature=signature, queries=queries, sunburst=sunburst, timings=timings)
+
+
+def dataset_store():
+    """The store of this process, started on first use.
+
+    A module global rather than st.cache_resource, so that the prewarm can
+    fill it before Streamlit (and its caches) are up.
+    """
+    global _store
+    with _lock:
+        if _store is None:
+            # the worker builds the first snapshot and then polls the source
+            # for changes every REFRESH_SECONDS
+            _store = DatasetStore(
+                build_snapshot,
+                lambda: source_signature(DATA_SOURCE),
+                poll_interval=REFRESH_SECONDS,
+            ).start()
+    return _store
+
+
+def prewarm(timeout=None):
+    """Block until the first snapshot is built and return it."""
+    started = time.perf_counter()
+    snapshot = dataset_store().current(timeout)
+    TIMINGS["prewarm"] = time.perf_counter() - started
+    return snapshot
+
+
+def record_first_render(page, seconds):
+    """Keep the duration of the process's first full rerun; later calls are ignored."""
+    global _first_render
+    with _lock:
+        if _first_render is not None:
+            return
+        _first_render = page
+        TIMINGS["first_render"] = seconds
+    logger.info("first render (%s): %s", page, _format(report()))
+
+
+def report():
+    """Start-up timings in seconds: the boot stages, then each deferred import."""
+    timings = dict(TIMINGS)
+    timings.update((f"import {name}", seconds) for name, seconds in IMPORT_SECONDS.items())
+    return timings
+
+
+def _format(timings):
+    return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    snapshot = prewarm()
+    logger.info("prewarmed %s: %s (snapshot: %s)", DATA_SOURCE, _format(report()),
+                _format(snapshot.timings))
+
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", APP_PATH, *(sys.argv[1:] if argv is None else argv)]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    # go through the importable module, so app.py's `import boot` finds the
+    # store this process prewarmed instead of a fresh copy of the module
+    import boot
+
+    sys.exit(boot.main())
@@ -0,0 +1,306 @@
+"""Size-bounded LRU caches for query results and rendered chart output.
+
+Values are the bytes (or strings) a chart renders to, so the bound is on their
+total size rather than on the number of entries: a handful of large images
+can't push the process past its budget, and thousands of small ones still fit.
+One cache is shared by every session, hence the lock.
+
+LRUCache lives in the memory of one process. DiskCache keeps its entries in a
+SQLite file instead, so they survive a restart or a deploy and are shared by
+every worker process on the host; values are pickled and the budget is on
+their pickled size.
+"""
+
+import contextlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _hit_ratio(hits, misses):
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """Least-recently-used mapping holding at most ``max_bytes`` of values.
+
+    ``sizeof(value)`` gives the size charged for a value (``len`` by default).
+    A value larger than the whole budget is returned but never stored.
+    """
+
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size), oldest first
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """The cached value of ``key``, computing and storing it on a miss.
+
+        ``compute`` runs outside the lock, so two sessions missing the same key
+        at once may both compute it; the result is the same either way.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": _hit_ratio(self.hits, self.misses),
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache:
+    """Least-recently-used mapping in a SQLite file, holding at most ``max_bytes``.
+
+    Safe to share between the threads of a process (one connection each) and
+    between processes. The file is in WAL mode and a lookup is a plain read,
+    so lookups never wait for each other or for a writer. Only put() takes
+    the write lock, for one short transaction. The bookkeeping of lookups
+    (last use, hit and miss counts) is kept in memory and written with the
+    next put(), or every FLUSH_EVERY lookups, so the LRU order and the stats
+    lag by at most that much.
+
+    Keys are any value with a stable ``repr`` (tuples of strings and
+    numbers); entries written under a different ``namespace`` are never
+    returned and age out on their own. The hit, miss and eviction counts are
+    kept in the file too, summed over every process using it.
+
+    The cache never fails a caller: a SQLite error (locked past ``timeout``,
+    disk full, I/O error) is logged, and get() reports a miss while put()
+    stores nothing.
+    """
+
+    FLUSH_EVERY = 64
+
+    def __init__(self, path, max_bytes, namespace="", timeout=30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._timeout = timeout
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._touched = {}  # stored key -> time of its last hit, not written yet
+        self._counts = {"hits": 0, "misses": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)",
+                             [("hits",), ("misses",), ("evictions",)])
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit: transactions are opened explicitly by _transaction()
+            conn = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two processes can't both
+        # read the total size and then both evict for it
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _key(self, key):
+        return repr((self.namespace, key))
+
+    def _take_pending(self):
+        with self._pending_lock:
+            touched, counts = self._touched, self._counts
+            self._touched, self._counts = {}, {"hits": 0, "misses": 0}
+        return touched, counts
+
+    def _write_pending(self, conn, touched, counts):
+        conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                         [(used, stored) for stored, used in touched.items()])
+        conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                         [(n, name) for name, n in counts.items() if n])
+
+    def _flush(self):
+        # best effort: lookups that can't be recorded are dropped, not retried
+        touched, counts = self._take_pending()
+        if not touched and not any(counts.values()):
+            return
+        try:
+            with self._transaction() as conn:
+                self._write_pending(conn, touched, counts)
+        except sqlite3.Error as exc:
+            logger.warning("could not record cache lookups in %s: %s", self.path, exc)
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key):
+        row = self._connection().execute(
+            "SELECT 1 FROM entries WHERE key = ?", (self._key(key),)
+        ).fetchone()
+        return row is not None
+
+    def get(self, key, default=None):
+        stored = self._key(key)
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE key = ?", (stored,)
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("cache lookup in %s failed, treating it as a miss: %s", self.path, exc)
+            return default
+        value = default
+        if row is not None:
+            try:
+                value = pickle.loads(row[0])
+            except Exception as exc:  # written by code that no longer unpickles
+                logger.warning("ignoring unreadable cache entry %s: %s", stored, exc)
+                row = None
+        with self._pending_lock:
+            if row is None:
+                self._counts["misses"] += 1
+            else:
+                self._counts["hits"] += 1
+                self._touched[stored] = time.time()
+            due = sum(self._counts.values()) >= self.FLUSH_EVERY
+        if due:
+            self._flush()
+        return value
+
+    def put(self, key, value):
+        stored = self._key(key)
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:  # not every value pickles; it just isn't stored
+            logger.warning("not caching %s: %s", stored, exc)
+            return
+        size = len(blob)
+        touched, counts = self._take_pending()
+        try:
+            with self._transaction() as conn:
+                self._write_pending(conn, touched, counts)
+                conn.execute("DELETE FROM entries WHERE key = ?", (stored,))
+                if size > self.max_bytes:
+                    return
+                conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?)",
+                             (stored, blob, size, time.time()))
+                excess = conn.execute("SELECT SUM(size) FROM entries").fetchone()[0] - self.max_bytes
+                if excess <= 0:
+                    return
+                evicted = []
+                for old, old_size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                    if excess <= 0:
+                        break
+                    evicted.append((old,))
+                    excess -= old_size
+                conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+                conn.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'",
+                             (len(evicted),))
+        except sqlite3.Error as exc:
+            logger.warning("could not store %s in %s: %s", stored, self.path, exc)
+
+    def get_or_compute(self, key, compute):
+        """The cached value of ``key``, computing and storing it on a miss.
+
+        ``compute`` runs outside any transaction, so two processes missing the
+        same key at once may both compute it; the result is the same either way.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        self._flush()
+        conn = self._connection()
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_ratio": _hit_ratio(counters["hits"], counters["misses"]),
+            "evictions": counters["evictions"],
+        }
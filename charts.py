@@ -0,0 +1,316 @@
+"""Figure builders for the dashboard pages.
+
+Each builder takes an analytics.EnrolmentQueries and the selections the chart
+depends on, and returns a Plotly or Matplotlib figure, so the Streamlit pages
+and the batch export (export_reports.py) draw exactly the same charts.
+
+Plotly Express and Matplotlib are imported by the first builder that needs
+them, not with this module: a process only serving Plotly pages never loads
+Matplotlib, and one serving cached figures loads neither.
+"""
+
+import io
+
+import pandas as pd
+
+from analytics import AGE_LABELS
+from profiling import timed_import
+
+# what st.pyplot passes to savefig, so a cached PNG looks like a live figure
+PNG_OPTIONS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+
+def _px():
+    return timed_import("plotly.express")
+
+
+def _figure(**kwargs):
+    return timed_import("matplotlib.figure").Figure(**kwargs)
+
+
+def render_png(fig):
+    """PNG bytes of a Matplotlib figure.
+
+    The builders below create their figures with the object-oriented API
+    (``Figure``, not ``plt.subplots``), so nothing is registered with pyplot
+    and a figure is freed as soon as its bytes are rendered.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **PNG_OPTIONS)
+    return buffer.getvalue()
+
+
+def _label_age_traces(fig):
+    # wide-form px charts name traces after the columns
+    fig.for_each_trace(lambda t: t.update(name=AGE_LABELS[t.name]))
+
+
+# ---------------- Overall Analysis ----------------
+
+STATE_BAR_TITLES = {
+    "age_0_5": "State-wise Age 0–5 Registrations",
+    "age_5_17": "State-wise Age 5_17 Registrations",
+    "age_18_greater": "State-wise Age 18+ Registrations",
+}
+
+
+def state_age_bar(queries, col):
+    fig = _px().bar(
+        queries.state_leaderboard().top(col, None),
+        x='state',
+        y=col,
+        title=STATE_BAR_TITLES[col],
+        labels={
+            'state': 'State',
+            col: 'Registrations'
+        },
+        text_auto=True,
+        template='plotly_white'
+    )
+
+    # ---------- Layout tuning ----------
+    fig.update_layout(
+        title=dict(x=0.5, font=dict(size=24)),
+        xaxis_title=dict(text="State", font=dict(size=16)),
+        yaxis_title=dict(text="Registrations", font=dict(size=16)),
+        xaxis_tickfont=dict(size=12),
+        yaxis_tickfont=dict(size=12),
+        height=700
+    )
+
+    fig.update_xaxes(tickangle=90)
+    return fig
+
+
+def monthly_stacked_bar(queries):
+    fig = _px().bar(
+        queries.monthly_trend(),
+        x="month",
+        y=["age_0_5", "age_5_17", "age_18_greater"],
+        title="Monthly Registration Distribution by Age Group",
+        labels={
+            "value": "Number of Registrations",
+            "month": "Month",
+            "variable": "Age Group"
+        },
+        template="plotly_white"
+    )
+    _label_age_traces(fig)
+
+    fig.update_layout(
+        barmode="stack",
+        title=dict(x=0.5),
+        xaxis_title="Month",
+        yaxis_title="Number of Registrations"
+    )
+    return fig
+
+
+def monthly_trend_line(queries):
+    # Line chart (stock style)
+    fig = _px().line(
+        queries.monthly_trend(),
+        x="month",
+        y=["age_0_5", "age_5_17", "age_18_greater"],
+        markers=True,
+        labels={
+            "value": "Number of Registrations",
+            "month": "Month",
+            "variable": "Age Group"
+        },
+        title="Month-wise Registration Trend (Age Groups)",
+        template="plotly_white"
+    )
+    _label_age_traces(fig)
+
+    fig.update_layout(
+        title=dict(x=0.5),
+        xaxis_title="Month",
+        yaxis_title="Number of Registrations"
+    )
+    return fig
+
+
+# ---------------- State Wise Analysis ----------------
+
+def age_pie(queries, state, month):
+    fig = _px().pie(
+        queries.age_totals(state=state, month=month).as_frame(),
+        names="Age Group",
+        values="No of Registration",
+        title=f"Age-wise Distribution ({month})",
+        template="plotly_white"
+    )
+
+    # ✅ labels + percent + COLOR FIX
+    fig.update_traces(
+        textinfo="percent+label",
+        textfont=dict(
+            size=25,
+            color="black"  # ⭐ IMPORTANT LINE
+        ),
+        marker=dict(line=dict(color="white", width=2))
+    )
+
+    # ✅ force pure white background
+    fig.update_layout(
+        title=dict(x=0.5),
+        paper_bgcolor="white",
+        plot_bgcolor="white",
+        margin=dict(t=60, b=40, l=40, r=40),
+        legend=dict(
+            bgcolor="white",
+            bordercolor="lightgray",
+            borderwidth=1,
+            font=dict(color="black")  # legend text bhi clear
+        )
+    )
+    return fig
+
+
+def age_bar(queries, state, month):
+    f_df = queries.age_totals(state=state, month=month).as_frame()
+    fig = _figure()
+    ax = fig.subplots()
+
+    ax.bar(
+        f_df["Age Group"],
+        f_df["No of Registration"]
+    )
+
+    ax.set_title("Age-wise Registration Distribution")
+    ax.set_xlabel("Age Group")
+    ax.set_ylabel("No of Registration")
+
+    # value labels
+    for i, v in enumerate(f_df["No of Registration"]):
+        ax.text(i, v, f"{v:,}", ha="center", va="bottom")
+    return fig
+
+
+def _age_lines(trend, key, title, xlabel, rotation):
+    fig = _figure(figsize=(10, 5))
+    ax = fig.subplots()
+
+    ax.plot(trend[key], trend["age_0_5"], marker="o", label="Age 0–5")
+    ax.plot(trend[key], trend["age_5_17"], marker="o", label="Age 5–17")
+    ax.plot(trend[key], trend["age_18_greater"], marker="o", label="Age 18+")
+
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Registrations")
+    ax.tick_params(axis='x', rotation=rotation)
+
+    ax.legend()
+    ax.grid(alpha=0.3)
+    return fig
+
+
+def state_monthly_line(queries, state):
+    return _age_lines(
+        queries.monthly_trend(state=state), "month",
+        "Month-wise Registration Trend by Age Group", "Month", 90
+    )
+
+
+def state_weekday_line(queries, state):
+    return _age_lines(
+        queries.weekday_trend(state=state), "days",
+        "Day-wise Registration Trend by Age Group", "Day", 45
+    )
+
+
+def sunburst(queries):
+    # independent of every selection, one figure serves the whole page
+    fig = _px().sunburst(
+        queries.sunburst_table(),
+        path=["month", "state", "Age Group"],
+        values="Registrations",
+        title="Month-wise Aadhaar Registration Distribution",
+        template="plotly_white"
+    )
+    fig.update_layout(
+        width=1500,
+        height=700,
+        title=dict(x=0.5),
+        plot_bgcolor="white",  # plot area
+        paper_bgcolor="white",  # outer background
+    )
+    return fig
+
+
+# ---------------- District Wise Analysis ----------------
+
+DISTRICT_AGE_NAMES = {
+    "age_0_5": "Age 0–5",
+    "age_5_17": "Age 5–17",
+    "age_18_greater": "Age 18+",
+}
+# the bottom-10 charts have always spelled this one with a plain hyphen
+BOTTOM_AGE_NAMES = dict(DISTRICT_AGE_NAMES, age_5_17="Age 5-17")
+
+
+def district_top_bar(queries, state, col):
+    fig = _px().bar(
+        queries.district_leaderboard(state).top(col, 10),
+        x="district",
+        y=col,
+        text_auto=True,
+        title=f"Top 10 Districts ({DISTRICT_AGE_NAMES[col]})",
+        labels={"district": "District", col: "Registrations"},
+        template="plotly_white"
+    )
+
+    fig.update_layout(xaxis_tickangle=-45)
+    return fig
+
+
+def district_bottom_bar(queries, state, col):
+    fig = _px().bar(
+        queries.district_leaderboard(state).bottom(col, 10),
+        x="district",
+        y=col,
+        text_auto=True,
+        title=f"Bottom 10 Districts ({BOTTOM_AGE_NAMES[col]})",
+        template="plotly_white"
+    )
+
+    fig.update_layout(xaxis_tickangle=-45)
+    return fig
+
+
+def district_monthly_line(queries, state, district):
+    # ---------------- Convert to long format (for plotly) ----------------
+    month_long = queries.monthly_trend(state=state, district=district).melt(
+        id_vars="month",
+        value_vars=["age_0_5", "age_5_17", "age_18_greater"],
+        var_name="Age Group",
+        value_name="Registrations"
+    )
+
+    return _px().line(
+        month_long,
+        x="month",
+        y="Registrations",
+        color="Age Group",
+        markers=True,
+        title=f"Month-wise Age Group Registration Sum ({district}, {state})",
+        template="plotly_white"
+    )
+
+
+def district_radar(queries, state, district):
+    comparison = queries.district_vs_state(state, district)
+    radar_df = pd.DataFrame({
+        "Age Group": ["Age 0–5", "Age 5–17", "Age 18+"],
+        "District": list(comparison.totals.as_dict().values()),
+        "State Avg": list(comparison.state_average.values())
+    })
+
+    return _px().line_polar(
+        radar_df,
+        r="District",
+        theta="Age Group",
+        line_close=True,
+        title=f"Age Group Dominance – {district}"
+    )
@@ -0,0 +1,201 @@
+"""Export the State Wise and District Wise pages for every state and district.
+
+    python export_reports.py --out reports --formats html,png,pdf --workers 8
+
+The figures are the ones the dashboard draws (see charts.py). The cube is
+computed once in the parent process and handed to every worker when the pool
+starts, so workers only render. One task covers one page for one state;
+finished tasks are appended to <out>/export-progress.jsonl, and running the
+command again skips them, so an interrupted export resumes where it stopped
+(as long as the data and formats are unchanged; --restart forces a full run).
+
+Plotly figures are written as HTML, and as PNG/PDF when kaleido is installed.
+Matplotlib figures are written as PNG/PDF.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from matplotlib.figure import Figure
+
+import charts
+from analytics import ENGINES, EnrolmentQueries
+from ingest import AGE_COLS, DEFAULT_MAX_MEMORY_MB, SOURCE_PATH
+
+PROGRESS_FILE = "export-progress.jsonl"
+PAGES = ("state", "district")
+FORMATS = ("html", "png", "pdf")
+
+# set in every worker by _init_worker
+_queries = None
+_formats = None
+
+
+def _slug(label):
+    return re.sub(r"[^\w.-]+", "_", str(label)).strip("_") or "_"
+
+
+def _task_key(task):
+    page, state = task
+    return f"{page}:{'*' if state is None else state}"
+
+
+def plan_tasks(queries, pages):
+    tasks = []
+    if "state" in pages:
+        tasks.append(("state", None))  # the sunburst doesn't depend on any selection
+        tasks += [("state", state) for state in queries.states()]
+    if "district" in pages:
+        tasks += [("district", state) for state in queries.states()]
+    return tasks
+
+
+def _task_figures(queries, task):
+    # (file name, builder) pairs; built one at a time so a task holds a
+    # single figure in memory however many districts the state has
+    page, state = task
+    if page == "state" and state is None:
+        yield "sunburst", lambda: charts.sunburst(queries)
+    elif page == "state":
+        name = _slug(state)
+        yield f"{name}__monthly_line", lambda: charts.state_monthly_line(queries, state)
+        yield f"{name}__weekday_line", lambda: charts.state_weekday_line(queries, state)
+        for month in queries.months():
+            yield f"{name}__{month}__age_pie", lambda m=month: charts.age_pie(queries, state, m)
+            yield f"{name}__{month}__age_bar", lambda m=month: charts.age_bar(queries, state, m)
+    else:
+        name = _slug(state)
+        for col in AGE_COLS:
+            yield f"{name}__top_{col}", lambda c=col: charts.district_top_bar(queries, state, c)
+            yield f"{name}__bottom_{col}", lambda c=col: charts.district_bottom_bar(queries, state, c)
+        for district in queries.districts(state):
+            prefix = f"{name}__{_slug(district)}"
+            yield f"{prefix}__monthly_line", lambda d=district: charts.district_monthly_line(queries, state, d)
+            yield f"{prefix}__radar", lambda d=district: charts.district_radar(queries, state, d)
+
+
+def _save(fig, base_path, formats):
+    written = 0
+    if isinstance(fig, Figure):
+        for fmt in formats["matplotlib"]:
+            fig.savefig(f"{base_path}.{fmt}", bbox_inches="tight")
+            written += 1
+        return written
+    for fmt in formats["plotly"]:
+        if fmt == "html":
+            # one plotly.min.js per page directory instead of one per file
+            fig.write_html(f"{base_path}.html", include_plotlyjs="directory")
+        else:
+            fig.write_image(f"{base_path}.{fmt}")
+        written += 1
+    return written
+
+
+def _init_worker(cube, formats):
+    global _queries, _formats
+    _queries = EnrolmentQueries(cube)
+    _formats = formats
+
+
+def _render_task(task, out_dir):
+    started = time.perf_counter()
+    page_dir = os.path.join(out_dir, task[0])
+    os.makedirs(page_dir, exist_ok=True)
+    written = 0
+    for name, build in _task_figures(_queries, task):
+        written += _save(build(), os.path.join(page_dir, name), _formats)
+    return task, written, time.perf_counter() - started
+
+
+def _static_images_available():
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def _load_progress(path, header, restart):
+    # returns the task keys already done; starts a new log if the data version
+    # or the formats differ from the ones the existing log was written for
+    if not restart and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            lines = [json.loads(line) for line in fh if line.strip()]
+        if lines and lines[0] == header:
+            return {line["task"] for line in lines[1:]}
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(header) + "\n")
+    return set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export dashboard pages for every state and district.")
+    parser.add_argument("--source", default=SOURCE_PATH, help="enrolment CSV or directory of CSVs")
+    parser.add_argument("--streaming", action="store_true", help="build the cube chunk by chunk")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB)
+    parser.add_argument("--engine", choices=ENGINES, default="pandas", help="what builds the cube")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--formats", default="html,png", help=f"comma separated, from {', '.join(FORMATS)}")
+    parser.add_argument("--pages", default=",".join(PAGES), help=f"comma separated, from {', '.join(PAGES)}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--restart", action="store_true", help="ignore the progress of a previous run")
+    args = parser.parse_args(argv)
+
+    formats = [fmt for fmt in args.formats.split(",") if fmt]
+    pages = [page for page in args.pages.split(",") if page]
+    unknown = (set(formats) - set(FORMATS)) | (set(pages) - set(PAGES))
+    if unknown:
+        parser.error(f"unknown value(s): {', '.join(sorted(unknown))}")
+
+    plotly_formats = [fmt for fmt in formats if fmt == "html"]
+    if {"png", "pdf"} & set(formats):
+        if _static_images_available():
+            plotly_formats += [fmt for fmt in formats if fmt != "html"]
+        else:
+            print("kaleido is not installed: Plotly charts are exported as HTML only", file=sys.stderr)
+            plotly_formats = plotly_formats or ["html"]
+    render_formats = {
+        "plotly": plotly_formats,
+        "matplotlib": [fmt for fmt in formats if fmt != "html"] or ["png"],
+    }
+
+    started = time.perf_counter()
+    queries = EnrolmentQueries.from_source(args.source, args.streaming, args.max_memory_mb, args.engine)
+    print(f"loaded cube: {len(queries.cube)} rows, version {queries.version} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    os.makedirs(args.out, exist_ok=True)
+    progress_path = os.path.join(args.out, PROGRESS_FILE)
+    header = {"version": queries.version, "formats": render_formats}
+    done = _load_progress(progress_path, header, args.restart)
+    tasks = [task for task in plan_tasks(queries, pages) if _task_key(task) not in done]
+    if done:
+        print(f"resuming: {len(done)} task(s) already exported, {len(tasks)} left")
+
+    files = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(queries.cube, render_formats),
+    ) as pool, open(progress_path, "a", encoding="utf-8") as progress:
+        futures = [pool.submit(_render_task, task, args.out) for task in tasks]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            task, written, seconds = future.result()
+            progress.write(json.dumps({"task": _task_key(task), "files": written}) + "\n")
+            progress.flush()
+            files += written
+            elapsed = time.perf_counter() - started
+            print(f"[{finished}/{len(tasks)}] {_task_key(task)}: {written} files in {seconds:.1f}s "
+                  f"({finished / elapsed:.2f} tasks/s, {files / elapsed:.1f} files/s)")
+
+    elapsed = time.perf_counter() - started
+    print(f"exported {files} files for {len(tasks)} task(s) in {elapsed:.1f}s "
+          f"with {args.workers} worker(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
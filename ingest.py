@@ -0,0 +1,802 @@
+"""Loading of the enrolment CSV with a columnar on-disk cache.
+
+The first load parses the CSV and writes a typed Parquet copy next to a small
+JSON file describing the source it came from. Later loads read the Parquet file
+as long as the source is unchanged (same size and mtime, or same content hash
+when only the mtime moved). Without pyarrow, or when the cache can't be
+written, everything falls back to parsing the CSV.
+
+Frames are returned in a compact schema: the dimensions are categoricals and
+the age counts use the smallest unsigned integer type that holds them. Time is
+encoded once, here, as sorted integer keys: ``date`` (yyyymmdd) and ``period``
+(the year-month, yyyymm) parsed from the date column, and the weekday in
+``days`` taken from the date too. Their categories are the sorted integers, so
+category codes follow the calendar across years and a date range is a binary
+search. Dates are read as DATE_FORMAT, or else as ISO dates. Rows whose date
+can't be read, and extracts without a date column, get ``period`` from the
+month name, with year 0.
+
+stream_cube() is the alternative for sources that don't fit in memory: it
+reads a CSV (or a directory of CSVs) in bounded chunks and folds each chunk
+straight into the (state, district, period, date, days) cube, never holding the raw
+rows all at once. ingest_incremental() keeps that cube on disk with a manifest
+of the files already folded in, so a new drop only costs parsing the new files.
+
+duckdb_cube() builds the same cube with DuckDB, when it is installed: the CSVs
+are scanned and summed by its multi-threaded engine straight from disk.
+
+write_columns() saves a cube as a column store, one ``.npy`` file per column
+(category codes for the keys, counts for the ages) plus a JSON manifest with
+the category labels and the fingerprints of the source files. read_columns()
+memory-maps it back read-only: several server processes on one host then
+share a single copy of the cube in the page cache and start without parsing.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from glob import glob
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# pandas 3 is copy-on-write by default, older versions have to opt in so that
+# slices of shared (frozen) frames never write back into them
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+SOURCE_PATH = "cleaned_aadhaar_enrolment.csv"
+CACHE_DIR = ".aadhaar_cache"
+
+# bump whenever the cached representation changes so old files get rebuilt
+CACHE_FORMAT = 4
+
+AGE_COLS = ["age_0_5", "age_5_17", "age_18_greater"]
+# the date determines period and days, so they add no rows to the cube
+CUBE_KEYS = ["state", "district", "period", "date", "days"]
+# the columns of the CSV the cube is built from (date is optional)
+SOURCE_KEYS = ["state", "district", "date", "month", "days"]
+DATE_FORMAT = "%d-%m-%Y"
+
+# peak memory allowed for one chunk of raw rows in stream_cube()
+DEFAULT_MAX_MEMORY_MB = 256
+
+MONTH_ORDER = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+DAY_ORDER = [
+    "Monday", "Tuesday", "Wednesday",
+    "Thursday", "Friday", "Saturday", "Sunday"
+]
+
+# dimension -> fixed category order (None means sorted labels, unordered)
+DIMENSIONS = {
+    "state": None,
+    "district": None,
+    "period": None,
+    "date": None,
+    "days": DAY_ORDER,
+}
+TIME_KEYS = ["period", "date"]
+
+
+def file_digest(path, block_size=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def source_fingerprint(path, digest=True):
+    stat = os.stat(path)
+    fingerprint = {
+        "format": CACHE_FORMAT,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if digest:
+        fingerprint["sha256"] = file_digest(path)
+    return fingerprint
+
+
+def _cache_paths(path, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return (
+        os.path.join(cache_dir, f"{stem}.parquet"),
+        os.path.join(cache_dir, f"{stem}.meta.json"),
+    )
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp_path, path)
+
+
+def matches_fingerprint(path, fingerprint):
+    """Return True when ``path`` still holds the content ``fingerprint`` describes.
+
+    A file that was only touched is accepted after a hash check, and
+    ``fingerprint["mtime_ns"]`` is updated so the caller can persist it.
+    """
+    try:
+        current = source_fingerprint(path, digest=False)
+    except OSError:
+        return False
+    if fingerprint.get("format") != CACHE_FORMAT or fingerprint.get("size") != current["size"]:
+        return False
+    if fingerprint.get("mtime_ns") == current["mtime_ns"]:
+        return True
+
+    # touched but maybe not edited: compare contents before throwing the cache away
+    if fingerprint.get("sha256") != file_digest(path):
+        return False
+    fingerprint["mtime_ns"] = current["mtime_ns"]
+    return True
+
+
+def cache_is_fresh(path, cache_dir=CACHE_DIR):
+    """Return True when the columnar copy of ``path`` can be used as is."""
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(data_path):
+        return False
+
+    mtime_ns = meta.get("mtime_ns")
+    if not matches_fingerprint(path, meta):
+        return False
+    if meta["mtime_ns"] != mtime_ns:
+        try:
+            _write_json_atomic(meta_path, meta)
+        except OSError:
+            pass
+    return True
+
+
+def write_cache(df, path, cache_dir=CACHE_DIR):
+    """Write ``df`` as the columnar copy of ``path``; return False if that isn't possible."""
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{data_path}.tmp"
+        _write_parquet(df, tmp_path)
+        os.replace(tmp_path, data_path)
+        _write_json_atomic(meta_path, source_fingerprint(path))
+    except ImportError:
+        logger.info("pyarrow is not installed, not caching %s", path)
+        return False
+    except Exception as exc:  # unwritable dir, mixed-type columns, ...
+        logger.warning("could not write columnar cache for %s: %s", path, exc)
+        return False
+    return True
+
+
+def _ordered_categorical(values, order):
+    # labels outside the fixed order (typos, "Unknown", ...) go after it rather
+    # than silently turning into NaN
+    extra = sorted(set(values.dropna().unique()) - set(order))
+    return pd.Categorical(values, categories=list(order) + extra, ordered=True)
+
+
+def _smallest_unsigned(values):
+    if not pd.api.types.is_numeric_dtype(values) or values.isna().any():
+        return values
+    if values.min() < 0 or not np.array_equal(values, np.floor(values)):
+        return values
+    return pd.to_numeric(values.astype("int64"), downcast="unsigned")
+
+
+def _key_categorical(values):
+    # categories are the sorted integers themselves (concatenated partial
+    # cubes may carry the keys as floats)
+    codes, categories = pd.factorize(pd.array(values, dtype="Int64"), sort=True)
+    return pd.Categorical.from_codes(codes, categories=np.asarray(categories, dtype="int64"))
+
+
+def _write_parquet(df, path):
+    # Parquet only reads string dictionaries back as categoricals, so the
+    # integer time keys are written with their categories spelled as text
+    keys = {col: df[col].cat.rename_categories(df[col].cat.categories.astype(str))
+            for col in TIME_KEYS if isinstance(df.get(col, pd.Series()).dtype, pd.CategoricalDtype)}
+    df.assign(**keys).to_parquet(path, index=False)
+
+
+def _restore_time_keys(df):
+    # the reverse of _write_parquet(): only the categories are converted back
+    for col in TIME_KEYS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.rename_categories(values.cat.categories.astype("int64"))
+            if values.cat.categories.is_monotonic_increasing:
+                df[col] = values
+                continue
+        df[col] = _key_categorical(values)
+    return df
+
+
+def _month_periods(months):
+    # month names -> the period key of year 0 (the year is unknown)
+    number = {name: i + 1 for i, name in enumerate(MONTH_ORDER)}
+    return pd.array(pd.Series(np.asarray(months, dtype=object)).map(number), dtype="Int64")
+
+
+def _parse_dates(values):
+    # DATE_FORMAT first; values it can't read get a second chance as ISO dates
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format="ISO8601", errors="coerce")
+    return parsed
+
+
+def _time_keys(df):
+    # raw date / month / days columns -> the integer period and date keys and
+    # the weekday, parsing each distinct date string once
+    if "date" in df.columns:
+        codes, uniques = pd.factorize(df["date"])
+        parsed = _parse_dates(pd.Series(np.asarray(uniques, dtype=object)))
+        ymd = pd.array(parsed.dt.year * 10000 + parsed.dt.month * 100 + parsed.dt.day, dtype="Int64")
+        weekday = pd.array(parsed.dt.day_name(), dtype=object)
+        date = ymd.take(codes, allow_fill=True)
+        days = weekday.take(codes, allow_fill=True).to_numpy()
+        period = date // 100
+        # rows without a usable date keep the weekday and the month they came with
+        if "days" in df.columns:
+            days = np.where(pd.isna(days), np.asarray(df["days"], dtype=object), days)
+        if "month" in df.columns:
+            period = period.fillna(_month_periods(df["month"]))
+        undated = int(date.isna().sum())
+        if undated:
+            logger.warning("%d row(s) without a readable date (%s), %d of them without a month",
+                           undated, DATE_FORMAT, int(period.isna().sum()))
+        df["date"] = date
+        df["period"] = period
+        df["days"] = days
+    elif "month" in df.columns:
+        df["period"] = _month_periods(df["month"])
+        df["date"] = pd.array(np.full(len(df), pd.NA), dtype="Int64")
+    return df.drop(columns="month", errors="ignore")
+
+
+def compact_frame(df):
+    """Return ``df`` with time keys, categorical dimensions and downcast age counters."""
+    df = df.copy()
+    if "period" not in df.columns:
+        df = _time_keys(df)
+    for col, order in DIMENSIONS.items():
+        if col not in df.columns:
+            continue
+        dtype = df[col].dtype
+        # categoricals are kept, unless they miss their fixed order (read
+        # with dtype="category", the categories are merely sorted)
+        if isinstance(dtype, pd.CategoricalDtype) and (order is None or dtype.ordered):
+            continue
+        if col in TIME_KEYS:
+            df[col] = _key_categorical(df[col])
+        elif order is None:
+            df[col] = df[col].astype("category")
+        else:
+            df[col] = _ordered_categorical(df[col], order)
+    for col in AGE_COLS:
+        if col in df.columns:
+            df[col] = _smallest_unsigned(df[col])
+    return df
+
+
+def _read_only(arr):
+    if arr.flags.writeable:
+        arr = arr.copy()
+        arr.flags.writeable = False
+    return arr
+
+
+def freeze_frame(df):
+    """Return a copy of ``df`` whose column buffers are read-only.
+
+    Frames shared between sessions are frozen so that any in-place write
+    (``df.loc[...] = ...``, ``arr[...] = ...``) raises instead of changing the
+    data for everyone. Buffers that are read-only already, like the mapped
+    columns of read_columns(), are shared rather than copied.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = _read_only(values.array.codes)
+            columns[col] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+        elif isinstance(values.dtype, np.dtype):
+            columns[col] = _read_only(values.to_numpy())
+        else:
+            # arrow-backed / nullable extension arrays are kept as they are
+            columns[col] = values.array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def memory_report(before, after):
+    """Per-column deep memory usage (bytes) of two versions of a frame."""
+    report = pd.DataFrame({
+        "before": before.memory_usage(index=False, deep=True),
+        "after": after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = report.sum()
+    report["saved_pct"] = (1 - report["after"] / report["before"]) * 100
+    return report
+
+
+def read_enrolment(path=SOURCE_PATH, cache_dir=CACHE_DIR, write=True):
+    """Load the enrolment file, from the columnar cache when it is fresh.
+
+    ``write=False`` reads a fresh cache but doesn't write one after parsing.
+    """
+    if cache_is_fresh(path, cache_dir):
+        data_path, _ = _cache_paths(path, cache_dir)
+        try:
+            return _restore_time_keys(pd.read_parquet(data_path))
+        except Exception as exc:
+            logger.warning("columnar cache %s is unreadable, re-parsing CSV: %s", data_path, exc)
+
+    raw = pd.read_csv(path, low_memory=False)
+    df = compact_frame(raw)
+    report = memory_report(raw, df)
+    logger.info(
+        "loaded %s: %d rows, %.1f MB -> %.1f MB in memory",
+        path, len(df),
+        report.loc["total", "before"] / 2**20,
+        report.loc["total", "after"] / 2**20,
+    )
+    del raw
+    if write:
+        write_cache(df, path, cache_dir)
+    return df
+
+
+def group_sums(codes, cardinalities, columns, dropna=True):
+    """Sum ``columns`` per combination of integer-coded keys.
+
+    ``codes`` holds one array of category codes per key (-1 for a missing
+    value, as in ``Categorical.codes``), ``cardinalities`` the number of
+    categories of each key and ``columns`` the arrays to sum (NaN counts as 0).
+    Returns ``(group_codes, sums)``: the codes of every key combination that
+    occurs, in key order (missing last, or left out with ``dropna``), and the
+    int64 sums of each column for it.
+
+    The keys are folded into one integer per row and every column is summed
+    with a single ``np.bincount`` pass, instead of pandas' generic hash
+    groupby. bincount adds in float64, which is exact for sums below 2**53.
+    """
+    cardinalities = list(cardinalities)
+    columns = [np.nan_to_num(c) if c.dtype.kind == "f" else c for c in map(np.asarray, columns)]
+    rows = len(columns[0]) if columns else len(codes[0])
+    if dropna:
+        keep = np.logical_and.reduce([c >= 0 for c in codes]) if codes else slice(None)
+        codes = [c[keep] for c in codes]
+        columns = [c[keep] for c in columns]
+        rows = len(codes[0]) if codes else rows
+    else:
+        # missing values become one extra code per key, sorted after the others
+        codes = [np.where(c < 0, n, c) for c, n in zip(codes, cardinalities)]
+        cardinalities = [n + 1 for n in cardinalities]
+
+    size = int(np.prod(cardinalities, dtype=np.int64))
+    combined = np.ravel_multi_index(codes, cardinalities) if codes else np.zeros(rows, np.intp)
+    dense = size <= max(4 * rows, 1 << 16)
+    if dense:
+        groups = np.flatnonzero(np.bincount(combined, minlength=size))
+        slots, n_slots = combined, size
+    else:
+        # too many possible combinations for dense bins: number the ones present
+        groups, slots = np.unique(combined, return_inverse=True)
+        n_slots = len(groups)
+    sums = np.empty((len(groups), len(columns)), dtype=np.float64)
+    for j, column in enumerate(columns):
+        summed = np.bincount(slots, weights=column, minlength=n_slots)
+        sums[:, j] = summed[groups] if dense else summed
+    group_codes = list(np.unravel_index(groups, cardinalities)) if codes else []
+    if not dropna:
+        group_codes = [np.where(c == n - 1, -1, c) for c, n in zip(group_codes, cardinalities)]
+    return group_codes, np.rint(sums).astype(np.int64)
+
+
+def roll_up(df, keys):
+    """Sum the age columns of ``df`` per combination of the categorical ``keys``.
+
+    One row per combination that occurs, sorted on the keys, with missing keys
+    kept as their own group (like ``groupby(keys, observed=True, dropna=False)``).
+    """
+    # categorical codes are the integer keys group_sums() needs
+    dtypes = [df[key].dtype for key in keys]
+    group_codes, sums = group_sums(
+        [df[key].cat.codes.to_numpy() for key in keys],
+        [len(dtype.categories) for dtype in dtypes],
+        [df[col].to_numpy() for col in AGE_COLS],
+        dropna=False,
+    )
+    rolled = {key: pd.Categorical.from_codes(c, dtype=dtype)
+              for key, c, dtype in zip(keys, group_codes, dtypes)}
+    rolled.update(zip(AGE_COLS, sums.T))
+    return pd.DataFrame(rolled)
+
+
+def aggregate_cube(df):
+    """Sum the age columns of ``df`` per (state, district, period, date, days), sorted on the keys."""
+    if not all(isinstance(df[key].dtype, pd.CategoricalDtype) for key in CUBE_KEYS):
+        return (
+            df.groupby(CUBE_KEYS, observed=True, dropna=False)[AGE_COLS]
+            .sum()
+            .astype("int64")
+            .reset_index()
+        )
+    # compact_frame() and the category chunks of stream_cube() always get here
+    return roll_up(df, CUBE_KEYS)
+
+
+def _is_source_column(col):
+    return col in SOURCE_KEYS or col in AGE_COLS
+
+
+def list_sources(source):
+    """The CSV files behind ``source``: the file itself, or every *.csv in a directory."""
+    if os.path.isdir(source):
+        return sorted(glob(os.path.join(source, "*.csv")))
+    return [source]
+
+
+def _rows_per_chunk(path, max_memory_mb, sample_rows=2000):
+    # measure a sample instead of guessing: district names and extra columns
+    # vary a lot between extracts. The factor leaves room for the parser's own
+    # buffers and the groupby on top of the parsed chunk.
+    sample = pd.read_csv(path, nrows=sample_rows, usecols=_is_source_column)
+    if sample.empty:
+        return sample_rows
+    bytes_per_row = sample.memory_usage(index=False, deep=True).sum() / len(sample)
+    return max(1000, int(max_memory_mb * 2**20 / (bytes_per_row * 3)))
+
+
+def _concat_cubes(parts):
+    """Stack partial cubes into one frame whose keys stay categorical.
+
+    Every chunk or file carries its own categories; ``pd.concat`` would turn
+    keys whose categories differ into plain object columns. Here each key is
+    recoded onto the union of the categories, in the order compact_frame()
+    gives them, so aggregate_cube() can merge the result on integer codes.
+    """
+    columns = {}
+    for key in CUBE_KEYS:
+        # union_categoricals() wants one category dtype, but a part whose key
+        # is all blank reads its (empty) categories as object
+        dtype = "int64" if key in TIME_KEYS else str
+        keyed = [part[key].cat.rename_categories(part[key].cat.categories.astype(dtype))
+                 for part in parts]
+        # sorted labels (sorted integers for the time keys), like compact_frame()
+        values = union_categoricals(keyed, sort_categories=True, ignore_order=True)
+        order = DIMENSIONS[key]
+        if order is not None:
+            extra = sorted(set(values.categories) - set(order))
+            values = values.set_categories(list(order) + extra, ordered=True)
+        columns[key] = values
+    for col in AGE_COLS:
+        columns[col] = np.concatenate([part[col].to_numpy() for part in parts])
+    return pd.DataFrame(columns)
+
+
+def stream_cube(source=SOURCE_PATH, max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+    """Build the aggregate cube from ``source`` without loading all raw rows.
+
+    Each file is read in chunks sized to stay within ``max_memory_mb`` and every
+    chunk is reduced to its cube rows right away. The partial cubes are merged
+    once the rows added since the last merge outnumber both one chunk and the
+    merged cube, so each row is merged a bounded number of times on average,
+    and memory stays within the chunk size plus about twice the number of
+    distinct keys.
+    """
+    dim_dtypes = {col: "category" for col in SOURCE_KEYS}
+    partials = []
+    merged_rows = 0  # rows of the merged cube, partials[0] after a merge
+    added_rows = 0  # rows of the partial cubes appended since
+    rows_read = 0
+
+    for path in list_sources(source):
+        chunk_rows = _rows_per_chunk(path, max_memory_mb)
+        reader = pd.read_csv(
+            path,
+            usecols=_is_source_column,
+            dtype=dim_dtypes,
+            chunksize=chunk_rows,
+        )
+        for chunk in reader:
+            rows_read += len(chunk)
+            part = aggregate_cube(compact_frame(chunk))
+            partials.append(part)
+            added_rows += len(part)
+            if added_rows > max(chunk_rows, merged_rows):
+                partials = [aggregate_cube(_concat_cubes(partials))]
+                merged_rows, added_rows = len(partials[0]), 0
+
+    if not partials:
+        raise FileNotFoundError(f"no enrolment CSV found at {source}")
+
+    cube = aggregate_cube(_concat_cubes(partials))
+    logger.info("streamed %d rows from %s into %d cube rows", rows_read, source, len(cube))
+    return cube
+
+
+def duckdb_cube(source=SOURCE_PATH, threads=None):
+    """Build the aggregate cube of ``source`` with DuckDB.
+
+    Same result as ``aggregate_cube(read_enrolment(source))``, but the CSVs
+    are never loaded into pandas: DuckDB scans them in parallel (on all cores
+    unless ``threads`` is given) and only the summed cube comes back. Raises
+    ImportError when duckdb is not installed.
+    """
+    import duckdb
+
+    paths = list_sources(source)
+    if not paths:
+        raise FileNotFoundError(f"no enrolment CSV found at {source}")
+    header = set()
+    for path in paths:
+        header.update(pd.read_csv(path, nrows=0).columns)
+    source_keys = [col for col in SOURCE_KEYS if col in header]
+    keys = ", ".join(source_keys)
+    # SUM over BIGINT is a HUGEINT in DuckDB, and NULL for a group without any
+    # value, where pandas gives 0
+    sums = ", ".join(f"COALESCE(SUM({col}), 0)::BIGINT AS {col}" for col in AGE_COLS)
+    con = duckdb.connect(config={} if threads is None else {"threads": threads})
+    try:
+        result = con.execute(
+            f"SELECT {keys}, {sums} "
+            "FROM read_csv(?, header = true, union_by_name = true, types = ?) "
+            f"GROUP BY {keys}",
+            [paths, {col: "VARCHAR" for col in source_keys}],
+        ).df()
+    finally:
+        con.close()
+    logger.info("duckdb summed %s into %d cube rows", source, len(result))
+    # the dimensions come back as plain strings; compact_frame() derives the
+    # time keys and the shared schema, aggregate_cube() the pandas row order
+    return aggregate_cube(compact_frame(result))
+
+
+def source_signature(source):
+    """Cheap (path, size, mtime) listing of ``source``; changes whenever a file does."""
+    signature = []
+    for path in list_sources(source):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def source_fingerprints(source, known=None):
+    """Fingerprint every file of ``source``, hashing only what ``known`` doesn't cover.
+
+    A file whose fingerprint in ``known`` still matches keeps it (a stat, or
+    a hash when only its mtime moved); new and changed files are hashed.
+    """
+    known = known or {}
+    fingerprints = {}
+    for path in list_sources(source):
+        fingerprint = known.get(path)
+        if fingerprint is None or not matches_fingerprint(path, fingerprint):
+            fingerprint = source_fingerprint(path)
+        fingerprints[path] = fingerprint
+    return fingerprints
+
+
+def recorded_fingerprints(source, cache_dir=CACHE_DIR):
+    """The file fingerprints of ``source`` already on record in ``cache_dir``.
+
+    Those of the incremental store and of the column store (the more recent
+    one wins); pass them to source_fingerprints() as ``known``.
+    """
+    recorded = {}
+    for manifest_path in (_store_paths(source, cache_dir)[1], _columns_paths(source, cache_dir)[1]):
+        manifest = _read_meta(manifest_path)
+        if manifest and manifest.get("format") == CACHE_FORMAT:
+            recorded.update(manifest.get("files", {}))
+    return recorded
+
+
+def _store_paths(source, cache_dir):
+    stem = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    return stem, os.path.join(cache_dir, f"{stem}.cube.json")
+
+
+def _load_store(manifest, cache_dir):
+    if manifest is None or manifest.get("format") != CACHE_FORMAT:
+        return None
+    try:
+        return _restore_time_keys(pd.read_parquet(os.path.join(cache_dir, manifest["cube"])))
+    except Exception as exc:
+        logger.warning("stored cube is unreadable, rebuilding: %s", exc)
+        return None
+
+
+def ingest_incremental(source=SOURCE_PATH, cache_dir=CACHE_DIR,
+                       max_memory_mb=DEFAULT_MAX_MEMORY_MB, engine="pandas",
+                       fingerprints=None):
+    """Return ``(cube, version)`` for ``source``, parsing only files not ingested yet.
+
+    The cube lives in ``cache_dir`` together with a manifest listing the
+    fingerprint of every file already folded into it. New files are streamed
+    and merged in and the version is bumped; files that were already ingested
+    are never re-read. If one of them changed or disappeared its rows can't be
+    taken back out of the sums, so the store is rebuilt from scratch.
+
+    New files are summed by stream_cube(), or by duckdb_cube() with
+    ``engine="duckdb"``. ``fingerprints`` may hold the caller's own
+    fingerprints of the files (source_fingerprints()), so new files aren't
+    hashed a second time.
+    """
+    stem, manifest_path = _store_paths(source, cache_dir)
+    manifest = _read_meta(manifest_path)
+    cube = _load_store(manifest, cache_dir)
+    files = list_sources(source)
+    ingested = manifest["files"] if cube is not None else {}
+    version = manifest.get("version", 0) if manifest else 0
+
+    if any(path not in files or not matches_fingerprint(path, fingerprint)
+           for path, fingerprint in ingested.items()):
+        logger.info("ingested files under %s changed, rebuilding the cube", source)
+        cube, ingested = None, {}
+
+    new_files = [path for path in files if path not in ingested]
+    if not new_files:
+        if cube is None:
+            raise FileNotFoundError(f"no enrolment CSV found at {source}")
+        return cube, version
+
+    parts = [] if cube is None else [cube]
+    for path in new_files:
+        ingested[path] = (fingerprints or {}).get(path) or source_fingerprint(path)
+        if engine == "duckdb":
+            parts.append(duckdb_cube(path))
+        else:
+            parts.append(stream_cube(path, max_memory_mb=max_memory_mb))
+    cube = parts[0] if len(parts) == 1 else aggregate_cube(_concat_cubes(parts))
+    version += 1
+    logger.info("ingested %d new file(s) from %s, cube version %d", len(new_files), source, version)
+
+    # the cube file is versioned and the manifest is replaced last, so a crash
+    # half way leaves the previous version intact instead of double counting
+    cube_name = f"{stem}.cube-v{version}.parquet"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_parquet(cube, os.path.join(cache_dir, cube_name))
+        _write_json_atomic(manifest_path, {
+            "format": CACHE_FORMAT,
+            "version": version,
+            "cube": cube_name,
+            "files": ingested,
+        })
+    except Exception as exc:
+        logger.warning("could not persist the cube for %s: %s", source, exc)
+        return cube, version
+
+    if manifest and manifest.get("cube") and manifest["cube"] != cube_name:
+        try:
+            os.remove(os.path.join(cache_dir, manifest["cube"]))
+        except OSError:
+            pass
+    return cube, version
+
+
+def _columns_paths(source, cache_dir):
+    stem = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    return stem, os.path.join(cache_dir, f"{stem}.columns.json")
+
+
+def write_columns(cube, source, fingerprints, cache_dir=CACHE_DIR):
+    """Save ``cube`` as the column store of ``source``; return False if that isn't possible.
+
+    ``fingerprints`` are those of the files the cube was built from, taken
+    before the build (source_fingerprints()), so a file edited meanwhile
+    doesn't match the store. Every column becomes one ``.npy`` file (the
+    category codes of a key, the counts of an age column) and the category
+    labels go into the manifest.
+    Files are written to a new directory and the manifest is replaced last,
+    so a process still mapping the previous version keeps reading it.
+    """
+    stem, manifest_path = _columns_paths(source, cache_dir)
+    previous = _read_meta(manifest_path)
+    directory = f"{stem}.columns-{uuid.uuid4().hex[:12]}"
+    labels = {}
+    try:
+        os.makedirs(os.path.join(cache_dir, directory))
+        for col in cube.columns:
+            values = cube[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.cat.categories
+                labels[col] = {
+                    "categories": categories.tolist(),
+                    "dtype": str(categories.dtype),
+                    "ordered": bool(values.cat.ordered),
+                }
+                values = values.array.codes
+            np.save(os.path.join(cache_dir, directory, f"{col}.npy"), np.asarray(values))
+        _write_json_atomic(manifest_path, {
+            "format": CACHE_FORMAT,
+            "directory": directory,
+            "rows": len(cube),
+            "columns": list(cube.columns),
+            "labels": labels,
+            "files": fingerprints,
+        })
+    except Exception as exc:
+        logger.warning("could not write the column store for %s: %s", source, exc)
+        shutil.rmtree(os.path.join(cache_dir, directory), ignore_errors=True)
+        return False
+
+    if previous and previous.get("directory") and previous["directory"] != directory:
+        # open mappings of the old files stay valid after the unlink
+        shutil.rmtree(os.path.join(cache_dir, previous["directory"]), ignore_errors=True)
+    return True
+
+
+def read_columns(source=SOURCE_PATH, cache_dir=CACHE_DIR):
+    """The cube of ``source`` memory-mapped from its column store, or None if it is stale.
+
+    The arrays are mapped read-only, so every process serving the same store
+    shares one copy of it in the OS page cache and nothing is parsed.
+    """
+    _, manifest_path = _columns_paths(source, cache_dir)
+    manifest = _read_meta(manifest_path)
+    if manifest is None or manifest.get("format") != CACHE_FORMAT:
+        return None
+    files = manifest["files"]
+    mtimes = [fingerprint.get("mtime_ns") for fingerprint in files.values()]
+    if sorted(files) != list_sources(source) or not all(
+            matches_fingerprint(path, fingerprint) for path, fingerprint in files.items()):
+        return None
+    if mtimes != [fingerprint["mtime_ns"] for fingerprint in files.values()]:
+        try:
+            _write_json_atomic(manifest_path, manifest)
+        except OSError:
+            pass
+
+    directory = os.path.join(cache_dir, manifest["directory"])
+    columns = {}
+    try:
+        for col in manifest["columns"]:
+            # a plain ndarray view of the mapping, pandas need not know it is a memmap
+            values = np.load(os.path.join(directory, f"{col}.npy"), mmap_mode="r").view(np.ndarray)
+            if col in manifest["labels"]:
+                label = manifest["labels"][col]
+                categories = pd.Index(label["categories"], dtype=label["dtype"])
+                dtype = pd.CategoricalDtype(categories, ordered=label["ordered"])
+                values = pd.Categorical.from_codes(values, dtype=dtype)
+            columns[col] = values
+    except (OSError, ValueError) as exc:
+        logger.warning("column store of %s is unreadable, rebuilding: %s", source, exc)
+        return None
+    return pd.DataFrame(columns, copy=False)
+
+
+if __name__ == "__main__":
+    # python ingest.py [path] -> memory of the raw vs the compact frame
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    raw = pd.read_csv(source, low_memory=False)
+    print(memory_report(raw, compact_frame(raw)).round(1).to_string())
@@ -0,0 +1,322 @@
+"""Concurrent-session load test of the dashboard over Streamlit's websocket.
+
+    python loadtest.py --sessions 20 --duration 60
+    python loadtest.py --servers 2 --sessions 40 --duration 120 --out load.json
+    python loadtest.py --url http://localhost:8501 --server-pid 1234 --sessions 10
+
+Starts --servers `streamlit run app.py` processes (or uses the running server
+at --url) and drives --sessions simulated users against them, spread round
+robin. A session speaks the browser's protocol: it opens /_stcore/stream,
+asks for a run, and from the widgets the run sends back picks its next
+interaction, like a user clicking through the sidebar: switching page, or
+changing the state, month or district of the current page, with --think-time
+seconds between interactions. Widgets inside a fragment rerun just that
+fragment, as they do in the browser.
+
+Latency is measured from sending a rerun to the server reporting the script
+finished. The report (printed, and written as JSON with --out) has p50/p95/p99
+latency overall and per interaction, reruns per second, errors, and the RSS
+of every server process sampled over the run.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+PAGE_SELECTOR = "Select One"
+PAGES = ["Overall Analysis", "State Wise Analysis", "District Wise Analysis"]
+# interaction -> relative weight when it is available on the current page
+ACTIONS = {
+    "page": 1.0,
+    "Select State": 2.0,
+    "Select Month": 2.0,
+    "Select District": 2.0,
+}
+
+_FINISHED_OK = {
+    ForwardMsg.ScriptFinishedStatus.FINISHED_SUCCESSFULLY,
+    ForwardMsg.ScriptFinishedStatus.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+}
+
+
+class Session:
+    """One simulated browser tab."""
+
+    def __init__(self, url, rng, timeout):
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.rng = rng
+        self.timeout = timeout
+        # widget id -> {"label", "options", "value", "fragment"}
+        self.widgets = {}
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def _widget(self, label):
+        for widget_id, widget in self.widgets.items():
+            if widget["label"] == label:
+                return widget_id, widget
+        return None, None
+
+    async def rerun(self, fragment=""):
+        """Send a rerun with the current widget values; return (seconds, error or None)."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment
+        for widget_id, widget in self.widgets.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = widget["value"]
+        if not fragment:
+            self.widgets = {}  # a full run re-sends every widget that still exists
+
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        error = None
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.ws.recv(), self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_kind = element.WhichOneof("type")
+                if element_kind == "selectbox":
+                    box = element.selectbox
+                    options = list(box.options)
+                    value = box.raw_value if box.set_value else (
+                        options[box.default] if options else "")
+                    self.widgets[box.id] = {
+                        "label": box.label,
+                        "options": options,
+                        "value": value,
+                        "fragment": forward.delta.fragment_id,
+                    }
+                elif element_kind == "exception":
+                    error = f"{element.exception.type}: {element.exception.message}"
+            elif kind == "script_finished":
+                if forward.script_finished not in _FINISHED_OK and error is None:
+                    error = ForwardMsg.ScriptFinishedStatus.Name(forward.script_finished)
+                return time.perf_counter() - started, error
+
+    def next_action(self):
+        """(action name, widget id, new value) of a random available interaction."""
+        choices = []
+        page_id, page = self._widget(PAGE_SELECTOR)
+        if page is not None:
+            choices.append(("page", page_id, page))
+        for label in ACTIONS:
+            widget_id, widget = self._widget(label)
+            if widget is not None and len(widget["options"]) > 1:
+                choices.append((label, widget_id, widget))
+        if not choices:
+            return None
+        name, widget_id, widget = self.rng.choices(choices, weights=[ACTIONS[c[0]] for c in choices])[0]
+        options = PAGES if name == "page" else widget["options"]
+        value = self.rng.choice([o for o in options if o != widget["value"]] or options)
+        return name, widget_id, value
+
+
+def _rss_mb(pid):
+    # Linux only; other platforms report None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _wait_healthy(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip("/") + "/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become healthy within {timeout}s")
+
+
+def start_servers(count, port, extra_args):
+    servers = []
+    for i in range(count):
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH,
+             "--server.headless", "true",
+             "--server.port", str(port + i),
+             "--browser.gatherUsageStats", "false", *extra_args],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        servers.append((f"http://localhost:{port + i}", proc))
+    return servers
+
+
+async def run_session(url, seed, deadline, think_time, timeout, samples, errors):
+    session = Session(url, random.Random(seed), timeout)
+    try:
+        await session.connect()
+        seconds, error = await session.rerun()
+        samples.append(("initial", seconds))
+        if error:
+            errors.append(("initial", error))
+        while time.monotonic() < deadline:
+            action = session.next_action()
+            if action is None:
+                break
+            name, widget_id, value = action
+            widget = session.widgets[widget_id]
+            widget["value"] = value
+            seconds, error = await session.rerun(fragment=widget["fragment"])
+            samples.append((name, seconds))
+            if error:
+                errors.append((name, error))
+            if think_time:
+                await asyncio.sleep(session.rng.expovariate(1 / think_time))
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+        errors.append(("connection", repr(exc)))
+    finally:
+        await session.close()
+
+
+async def sample_rss(pids, interval, stop, rss):
+    while not stop.is_set():
+        for pid in pids:
+            value = _rss_mb(pid)
+            if value is not None:
+                rss.setdefault(pid, []).append(value)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": int(len(ms)),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+async def load_test(urls, pids, sessions, duration, think_time, timeout, seed, ramp_up):
+    samples, errors, rss = [], [], {}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pids, 0.5, stop, rss))
+    started = time.monotonic()
+    deadline = started + duration
+    tasks = []
+    for i, url in zip(range(sessions), itertools.cycle(urls)):
+        tasks.append(asyncio.create_task(
+            run_session(url, seed + i, deadline, think_time, timeout, samples, errors)
+        ))
+        if ramp_up:
+            await asyncio.sleep(ramp_up / sessions)
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+    stop.set()
+    await sampler
+
+    interactions = [s for name, s in samples if name != "initial"]
+    by_action = {}
+    for name, seconds in samples:
+        by_action.setdefault(name, []).append(seconds)
+    return {
+        "sessions": sessions,
+        "servers": len(urls),
+        "duration_s": elapsed,
+        "reruns": len(samples),
+        "reruns_per_s": len(samples) / elapsed,
+        "latency": _latency_summary(interactions) if interactions else None,
+        "latency_by_action": {name: _latency_summary(values) for name, values in by_action.items()},
+        "errors": len(errors),
+        "error_samples": sorted({f"{name}: {error}" for name, error in errors})[:10],
+        "rss_mb": {
+            str(pid): {"start": values[0], "peak": max(values), "end": values[-1]}
+            for pid, values in rss.items()
+        },
+    }
+
+
+def _print_report(report):
+    print(f"{report['sessions']} sessions on {report['servers']} server(s), "
+          f"{report['reruns']} reruns in {report['duration_s']:.1f}s "
+          f"({report['reruns_per_s']:.1f}/s), {report['errors']} errors")
+    rows = [("all interactions", report["latency"])] + sorted(report["latency_by_action"].items())
+    for name, stats in rows:
+        if stats:
+            print(f"  {name:<18} n={stats['count']:<6} p50 {stats['p50_ms']:8.1f} ms  "
+                  f"p95 {stats['p95_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms")
+    for pid, rss in report["rss_mb"].items():
+        print(f"  server pid {pid}: RSS {rss['start']:.0f} -> peak {rss['peak']:.0f} MB "
+              f"(end {rss['end']:.0f} MB)")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent sessions.")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of interaction")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="mean seconds between a session's interactions (0 = back to back)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which sessions start")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for one rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", action="append", help="use a running server (repeatable)")
+    parser.add_argument("--server-pid", type=int, action="append", default=[],
+                        help="pid of a --url server, to sample its RSS")
+    parser.add_argument("--servers", type=int, default=1, help="servers to start when no --url is given")
+    parser.add_argument("--port", type=int, default=8600, help="first port for started servers")
+    parser.add_argument("--out", help="write the report as JSON")
+    args, server_args = parser.parse_known_args(argv)
+
+    servers = [] if args.url else start_servers(args.servers, args.port, server_args)
+    urls = args.url or [url for url, _ in servers]
+    pids = args.server_pid + [proc.pid for _, proc in servers]
+    try:
+        for url in urls:
+            _wait_healthy(url, timeout=60)
+        report = asyncio.run(load_test(
+            urls, pids, args.sessions, args.duration,
+            args.think_time, args.timeout, args.seed, args.ramp_up,
+        ))
+    finally:
+        for _, proc in servers:
+            proc.terminate()
+            proc.wait()
+
+    _print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Opt-in timing and allocation tracking of the dashboard's sections.
+
+    profiler = Profiler(enabled=True, log_path="aadhaar_profile.jsonl", page="State Wise Analysis")
+    with profiler.section("figure age_pie"):
+        with profiler.section("build"):
+            ...
+
+Every section records its wall time, the memory it left allocated and the
+peak it allocated on top of what was live when it started (from tracemalloc,
+so numpy and pandas buffers count). Sections nest; a nested record is named
+after its parents ("figure age_pie/build"). Each finished top-level section is
+appended to the JSONL log with everything nested in it, and the records of
+the current rerun are kept for the sidebar panel.
+
+A disabled profiler hands out one shared no-op context manager, so leaving
+the calls in place costs a method call per section.
+
+tracemalloc slows down every allocation of the whole process and has a
+single peak counter, so only one profiler at a time measures memory: it
+starts tracemalloc and stops it again when it is closed (or collected).
+Profilers running meanwhile, in other sessions, record times only.
+
+timed_import() is for modules imported on first use rather than at start-up
+(the plotting backends): it records how long each first import took.
+"""
+
+import contextlib
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+
+import pandas as pd
+
+_NULL_SECTION = contextlib.nullcontext()
+_log_lock = threading.Lock()
+
+# module -> seconds its first import took, for modules loaded by timed_import()
+IMPORT_SECONDS = {}
+
+_memory_lock = threading.Lock()
+_memory_owner = None  # run_id of the profiler tracemalloc is running for
+
+
+def _claim_memory(run_id):
+    global _memory_owner
+    with _memory_lock:
+        # tracing started by someone else (a benchmark, PYTHONTRACEMALLOC) is
+        # left alone: its peak counter isn't ours to reset
+        if _memory_owner is not None or tracemalloc.is_tracing():
+            return False
+        tracemalloc.start()
+        _memory_owner = run_id
+        return True
+
+
+def _release_memory(run_id):
+    global _memory_owner
+    with _memory_lock:
+        if _memory_owner == run_id:
+            tracemalloc.stop()
+            _memory_owner = None
+
+
+def timed_import(name):
+    """Import module ``name``, recording the time taken when it wasn't loaded yet."""
+    # always through import_module: a module another thread is still
+    # importing is already in sys.modules, and only the import lock waits
+    # for it to finish initializing
+    first = name not in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if first:
+        IMPORT_SECONDS.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+class Profiler:
+    """Section records of one rerun."""
+
+    def __init__(self, enabled=False, log_path=None, page=None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.records = []
+        self._stack = []  # open sections: [name, start time, start memory, peak seen]
+        self._pending = []  # records not written to the log yet
+        self.closed = False
+        self.measures_memory = enabled and _claim_memory(self.run_id)
+        # a rerun that stops half way never reaches close(); collecting the
+        # profiler then releases tracemalloc instead
+        self._release = weakref.finalize(self, _release_memory, self.run_id)
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        return self._section(name)
+
+    def close(self):
+        """End the rerun: write what is left to the log and release tracemalloc."""
+        self.flush()
+        self._release()
+        # tracemalloc may be another profiler's by now: sections of a closed
+        # profiler record times only
+        self.measures_memory = False
+        self.closed = True
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if self.measures_memory else 0
+
+    def _fold_peak(self):
+        # tracemalloc has a single peak counter; before a section resets it,
+        # the peak so far is credited to every section that is still open
+        if not self.measures_memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame[3] = max(frame[3], peak)
+
+    @contextlib.contextmanager
+    def _section(self, name):
+        self._fold_peak()
+        if self.measures_memory:
+            tracemalloc.reset_peak()
+        current = self._memory()
+        frame = [name, time.perf_counter(), current, current]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame[1]
+            self._fold_peak()
+            self._stack.pop()
+            memory = self.measures_memory
+            self._record({
+                "section": "/".join([f[0] for f in self._stack] + [name]),
+                "depth": len(self._stack),
+                "ms": elapsed * 1000,
+                "alloc_kb": (self._memory() - frame[2]) / 1024 if memory else None,
+                "peak_kb": (frame[3] - frame[2]) / 1024 if memory else None,
+            })
+
+    def _record(self, record):
+        record.update(run=self.run_id, page=self.page, ts=time.time())
+        self.records.append(record)
+        self._pending.append(record)
+        if not self._stack:
+            self.flush()
+
+    def flush(self):
+        if not self.log_path or not self._pending:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self._pending)
+        self._pending = []
+        with _log_lock:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as fh:
+                fh.write(lines)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def frame(self):
+        """This rerun's records, in the order the sections started."""
+        if not self.records:
+            return pd.DataFrame(columns=["section", "ms", "alloc_kb", "peak_kb"])
+        # records are appended as sections end, so a parent comes after its children
+        frame = pd.DataFrame(self.records)
+        frame["start"] = frame["ts"] - frame["ms"] / 1000
+        return (
+            frame.sort_values(["start", "depth"])[["section", "ms", "alloc_kb", "peak_kb"]]
+            .reset_index(drop=True)
+        )
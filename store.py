@@ -0,0 +1,83 @@
+"""Background rebuild of the dashboard's dataset snapshot.
+
+A DatasetStore owns the snapshot every session reads (the cube and everything
+precomputed from it). A daemon thread builds the first snapshot as soon as the
+store starts, then polls the source signature and builds a replacement off the
+request path whenever it changes. The new snapshot replaces the old one with a
+single reference assignment, so a rerun sees either the previous version or
+the new one in full, and nobody waits for a rebuild after the first load.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetStore:
+    """Current snapshot of the data plus the worker thread that keeps it fresh.
+
+    ``build(signature)`` returns the snapshot for a source signature and
+    ``signature()`` returns the current one; both run on the worker thread, so
+    they must not call Streamlit.
+    """
+
+    def __init__(self, build, signature, poll_interval=30.0):
+        self._build = build
+        self._signature = signature
+        self.poll_interval = poll_interval
+        # (signature, snapshot), replaced as a whole so readers never see a mix
+        self._current = None
+        self._ready = threading.Event()
+        self._rebuild_lock = threading.Lock()
+        self._thread = None
+        self.last_error = None
+        self.builds = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dataset-rebuild", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.poll_interval)
+
+    def refresh(self):
+        """Rebuild if the source changed; return True when a new snapshot was swapped in."""
+        with self._rebuild_lock:
+            try:
+                signature = self._signature()
+                if self._current is not None and self._current[0] == signature:
+                    return False
+                started = time.perf_counter()
+                snapshot = self._build(signature)
+                self._current = (signature, snapshot)
+                self.builds += 1
+                self.last_error = None
+                logger.info("dataset snapshot %d ready in %.2fs", self.builds, time.perf_counter() - started)
+                return True
+            except Exception as exc:
+                # keep serving the previous snapshot, retry on the next poll
+                logger.exception("dataset rebuild failed")
+                self.last_error = exc
+                return False
+            finally:
+                self._ready.set()
+
+    @property
+    def signature(self):
+        current = self._current
+        return None if current is None else current[0]
+
+    def current(self, timeout=None):
+        """The latest snapshot; blocks only until the very first build finishes."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError("dataset is still loading")
+        current = self._current
+        if current is None:
+            raise RuntimeError("dataset could not be loaded") from self.last_error
+        return current[1]
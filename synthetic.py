@@ -0,0 +1,160 @@
+"""Synthetic enrolment data in the schema of cleaned_aadhaar_enrolment.csv.
+
+    python synthetic.py 10M data/synthetic_10M.csv
+    python synthetic.py 50M data/synthetic_50M --parts 10
+
+The columns are the ones the dashboard reads (date, state, district, pincode,
+the three age counts, month and days), with the shape of the real extract:
+state sizes are heavily skewed, the number of districts grows with the state,
+registrations peak in September and dip in March, Sundays are quiet, and
+children under 5 dominate the counts while adults are rare. Rows are written
+in chunks, so the size of the output isn't limited by memory, and the same
+seed always gives the same file.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import AGE_COLS
+
+STATES = [
+    "Uttar Pradesh", "Maharashtra", "Bihar", "West Bengal", "Madhya Pradesh",
+    "Tamil Nadu", "Rajasthan", "Karnataka", "Gujarat", "Andhra Pradesh",
+    "Odisha", "Telangana", "Kerala", "Jharkhand", "Assam", "Punjab",
+    "Chhattisgarh", "Haryana", "Delhi", "Jammu And Kashmir", "Uttarakhand",
+    "Himachal Pradesh", "Tripura", "Meghalaya", "Manipur", "Nagaland", "Goa",
+    "Arunachal Pradesh", "Puducherry", "Mizoram", "Chandigarh", "Sikkim",
+    "Dadra And Nagar Haveli And Daman And Diu", "Andaman And Nicobar Islands",
+    "Ladakh", "Lakshadweep",
+]
+
+# relative registration volume per calendar month (September peak, March low)
+MONTH_WEIGHTS = {
+    1: 0.7, 2: 0.7, 3: 0.4, 4: 0.8, 5: 0.75, 6: 0.55,
+    7: 1.0, 8: 0.9, 9: 1.6, 10: 1.2, 11: 1.3, 12: 1.0,
+}
+# Monday .. Sunday
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.95, 0.7, 0.25]
+
+# mean registrations per row and age group
+AGE_MEANS = {"age_0_5": 12.0, "age_5_17": 5.0, "age_18_greater": 0.8}
+
+CHUNK_ROWS = 1_000_000
+
+
+def parse_rows(text):
+    """'1M' -> 1_000_000, '500k' -> 500_000, '2500' -> 2500."""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 10**3, "m": 10**6, "b": 10**9}.get(text[-1:], 1)
+    return int(float(text.rstrip("kmb")) * scale)
+
+
+def _geography(rng):
+    # Zipf-like state weights; districts roughly follow the state's size
+    state_weights = 1 / np.arange(1, len(STATES) + 1) ** 0.9
+    state_weights /= state_weights.sum()
+    districts, district_state, district_weights = [], [], []
+    for code, (state, weight) in enumerate(zip(STATES, state_weights)):
+        n = int(np.clip(round(weight * 700), 1, 75))
+        shares = rng.dirichlet(np.full(n, 2.0))
+        districts += [f"{state} District {i + 1:02d}" for i in range(n)]
+        district_state += [code] * n
+        district_weights += list(weight * shares)
+    district_weights = np.asarray(district_weights)
+    return (
+        np.asarray(districts, dtype=object),
+        np.asarray(district_state),
+        district_weights / district_weights.sum(),
+    )
+
+
+def _calendar(start, days):
+    dates = pd.date_range(start, periods=days, freq="D")
+    weights = (np.array([MONTH_WEIGHTS[m] for m in dates.month])
+               * np.array(WEEKDAY_WEIGHTS)[dates.dayofweek])
+    return dates, weights / weights.sum()
+
+
+def generate_chunks(rows, seed=0, part=0, start="2025-03-01", days=300, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` rows, ``rows`` in total.
+
+    The geography depends on ``seed`` only, the rows on ``seed`` and ``part``,
+    so the parts of a split file describe the same states and districts.
+    """
+    districts, district_state, district_weights = _geography(np.random.default_rng(seed))
+    rng = np.random.default_rng([seed, part])
+    states = np.asarray(STATES, dtype=object)
+    # every district gets its own block of pincodes
+    pin_base = 110000 + np.arange(len(districts)) * 1000
+    dates, date_weights = _calendar(start, days)
+    date_text = np.asarray(dates.strftime("%d-%m-%Y"), dtype=object)
+    month_text = np.asarray(dates.month_name(), dtype=object)
+    day_text = np.asarray(dates.day_name(), dtype=object)
+
+    # at least one (possibly empty) chunk, so an empty file still gets its header
+    for offset in range(0, max(rows, 1), chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        district = rng.choice(len(districts), size=n, p=district_weights)
+        date = rng.choice(len(dates), size=n, p=date_weights)
+        # busier days get bigger counts, not only more rows
+        activity = date_weights[date] * len(dates)
+        chunk = {
+            "date": date_text[date],
+            "state": states[district_state[district]],
+            "district": districts[district],
+            "pincode": pin_base[district] + rng.integers(0, 1000, n),
+        }
+        for col in AGE_COLS:
+            chunk[col] = rng.poisson(AGE_MEANS[col] * activity)
+        chunk["month"] = month_text[date]
+        chunk["days"] = day_text[date]
+        yield pd.DataFrame(chunk)
+
+
+def write_csv(path, rows, seed=0, parts=1, **kwargs):
+    """Write ``rows`` synthetic rows to ``path``, or to ``parts`` CSVs in the directory ``path``.
+
+    Returns the list of files written.
+    """
+    if parts > 1:
+        os.makedirs(path, exist_ok=True)
+        paths = [os.path.join(path, f"part-{i:03d}.csv") for i in range(parts)]
+    else:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        paths = [path]
+    per_part = -(-rows // len(paths))
+    for i, part_path in enumerate(paths):
+        part_rows = max(0, min(per_part, rows - i * per_part))
+        tmp_path = part_path + ".tmp"
+        for j, chunk in enumerate(generate_chunks(part_rows, seed=seed, part=i, **kwargs)):
+            chunk.to_csv(tmp_path, mode="w" if j == 0 else "a", header=j == 0, index=False)
+        os.replace(tmp_path, part_path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic enrolment CSVs.")
+    parser.add_argument("rows", type=parse_rows, help="number of rows, e.g. 1M, 10M, 50M")
+    parser.add_argument("path", help="output CSV (or directory with --parts)")
+    parser.add_argument("--parts", type=int, default=1, help="split into this many CSVs in a directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2025-03-01", help="first date")
+    parser.add_argument("--days", type=int, default=300, help="number of days covered")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    paths = write_csv(args.path, args.rows, seed=args.seed, parts=args.parts,
+                      start=args.start, days=args.days)
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"wrote {args.rows:,} rows to {len(paths)} file(s), {size / 2**20:.0f} MB "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
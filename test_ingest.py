@@ -0,0 +1,47 @@
+"""Regression tests for ingest.py (run with ``python -m pytest``)."""
+
+import pandas as pd
+
+import ingest
+
+ROWS = {
+    "state": ["Kerala", "Kerala", "Goa", "Goa"],
+    "district": ["Kollam", "Idukki", "North Goa", "North Goa"],
+    "date": ["01-09-2025", "02-09-2025", "01-09-2025", "03-10-2025"],
+    "month": ["September", "September", "September", "October"],
+    "days": ["Monday", "Tuesday", "Monday", "Friday"],
+    "age_0_5": [1, 2, 3, 4],
+    "age_5_17": [5, 6, 7, 8],
+    "age_18_greater": [9, 10, 11, 12],
+}
+
+
+def _cube(frame):
+    return ingest.aggregate_cube(ingest.compact_frame(frame))
+
+
+def test_concat_cubes_with_a_blank_key_column():
+    # a drop with no districts reads the column's (empty) categories as
+    # object, the other parts have string categories
+    full = pd.DataFrame(ROWS)
+    blank = full.assign(district=pd.Series([None] * len(full), dtype=object))
+    parts = [_cube(full), _cube(blank)]
+    assert parts[0]["district"].cat.categories.dtype != parts[1]["district"].cat.categories.dtype
+
+    merged = ingest.aggregate_cube(ingest._concat_cubes(parts))
+
+    expected = _cube(pd.concat([full, blank], ignore_index=True))
+    pd.testing.assert_frame_equal(merged, expected)
+    assert all(isinstance(merged[key].dtype, pd.CategoricalDtype) for key in ingest.CUBE_KEYS)
+
+
+def test_stream_cube_of_a_directory_with_a_blank_district_file(tmp_path):
+    full = pd.DataFrame(ROWS)
+    blank = full.assign(district=None)
+    full.to_csv(tmp_path / "a.csv", index=False)
+    blank.to_csv(tmp_path / "b.csv", index=False)
+
+    cube = ingest.stream_cube(str(tmp_path), max_memory_mb=1)
+
+    expected = _cube(pd.concat([full, blank], ignore_index=True))
+    pd.testing.assert_frame_equal(cube, expected)